@@ -0,0 +1,213 @@
+"""
+Throughput benchmarks for TetrisEngine, through process_input (engine)
+and run_sequence (sequence), and for the tetris_engine CLI.
+
+Results are printed and saved as JSON, pass a previous result file
+with --compare to see the change between two commits:
+
+    python benchmarks/run_benchmarks.py --output new.json --compare old.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.workloads import WORKLOADS  # noqa: E402
+from benchmarks.workloads import format_line  # noqa: E402
+from tetris_engine.engine import GRID_MAX_COLS  # noqa: E402
+from tetris_engine.engine import TetrisEngine  # noqa: E402
+from tetris_engine.shapes import SHAPE_IDS  # noqa: E402
+
+CLI_SCRIPT = os.path.join(ROOT, "bin", "tetris_engine")
+# Inputs per line of the input file of the CLI benchmark.
+CLI_LINE_LENGTH = 100
+
+
+def simulate(engine, shapes):
+    """
+    Simulate one run with process_input and return the number of rows
+    removed.
+    """
+    engine.initialize()
+    rows_cleared = engine.n_rows_cleared
+    for input_shape in shapes:
+        engine.process_input(input_shape)
+    return engine.n_rows_cleared - rows_cleared
+
+
+def simulate_codes(engine, codes):
+    """
+    Simulate one run with run_sequence, as the CLI does, and return the
+    number of rows removed.
+    """
+    engine.initialize()
+    rows_cleared = engine.n_rows_cleared
+    engine.run_sequence(codes)
+    return engine.n_rows_cleared - rows_cleared
+
+
+def to_codes(sequence):
+    """
+    Returns the (shape id, col) codes of a workload sequence.
+    """
+    return [(SHAPE_IDS[shape_class.shape_type], col)
+            for shape_class, col in sequence]
+
+
+def bench_engine(workload, tot_cols, length, seed, memory=True,
+                 target="engine"):
+    """
+    Benchmark TetrisEngine on a single run, through process_input for
+    the 'engine' target and through run_sequence for the 'sequence'
+    one.
+
+    Returns:
+        dict: The result of the benchmark.
+    """
+    sequence = WORKLOADS[workload](seed, length, tot_cols)
+    if target == "engine":
+        run = [shape_class(col) for shape_class, col in sequence]
+        simulate_run = simulate
+    else:
+        run = to_codes(sequence)
+        simulate_run = simulate_codes
+    engine = TetrisEngine(tot_rows=None, tot_cols=tot_cols)
+    start = time.perf_counter()
+    clears = simulate_run(engine, run)
+    seconds = time.perf_counter() - start
+    peak_memory = None
+    if memory:
+        tracemalloc.start()
+        simulate_run(engine, run)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return make_result(target, workload, tot_cols, length, seconds,
+                       clears, peak_memory)
+
+
+def bench_cli(workload, length, seed):
+    """
+    Benchmark the CLI on an input file of lines of CLI_LINE_LENGTH
+    inputs, on the default grid.
+
+    Returns:
+        dict: The result of the benchmark.
+    """
+    sequence = list(WORKLOADS[workload](seed, length, GRID_MAX_COLS))
+    lines = [sequence[idx:idx + CLI_LINE_LENGTH]
+             for idx in range(0, len(sequence), CLI_LINE_LENGTH)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "input.txt")
+        output_file = os.path.join(tmp_dir, "output.txt")
+        with open(input_file, "w") as fp:
+            for line in lines:
+                fp.write(format_line(line) + "\n")
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, CLI_SCRIPT, input_file, output_file], env=env)
+        _pid, status, rusage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+        process.returncode = status
+        if status:
+            raise subprocess.CalledProcessError(status, CLI_SCRIPT)
+    # ru_maxrss is in kilobytes on linux.
+    peak_memory = rusage.ru_maxrss * 1024
+    # The rows the CLI removed, every line is a run of its own.
+    engine = TetrisEngine(tot_rows=None, tot_cols=GRID_MAX_COLS)
+    clears = sum(simulate_codes(engine, to_codes(line)) for line in lines)
+    return make_result("cli", workload, GRID_MAX_COLS, length, seconds,
+                       clears, peak_memory)
+
+
+def make_result(target, workload, tot_cols, length, seconds, clears,
+                peak_memory):
+    return {
+        "target": target,
+        "workload": workload,
+        "cols": tot_cols,
+        "pieces": length,
+        "seconds": seconds,
+        "pieces_per_sec": length / seconds,
+        "clears": clears,
+        "clears_per_sec": clears / seconds if clears is not None else None,
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def result_key(result):
+    return (result["target"], result["workload"], result["cols"],
+            result["pieces"])
+
+
+def format_result(result, baseline=None):
+    line = "{target:8} {workload:7} cols={cols:<5} pieces={pieces:<8} " \
+        "{pieces_per_sec:12.0f} pieces/s".format(**result)
+    if result["clears_per_sec"] is not None:
+        line += " {:10.0f} clears/s".format(result["clears_per_sec"])
+    if result["peak_memory_bytes"] is not None:
+        line += " {:8.1f} MiB peak".format(
+            result["peak_memory_bytes"] / 2.0 ** 20)
+    if baseline:
+        line += " ({:+.1%} vs baseline)".format(
+            result["pieces_per_sec"] / baseline["pieces_per_sec"] - 1)
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--workloads", nargs="+", default=sorted(WORKLOADS),
+                        choices=sorted(WORKLOADS))
+    parser.add_argument("--widths", nargs="+", type=int,
+                        default=[10, 100, 1000])
+    parser.add_argument("--lengths", nargs="+", type=int,
+                        default=[10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip the peak memory measurement")
+    parser.add_argument("--no-cli", action="store_true",
+                        help="Skip the CLI benchmarks")
+    parser.add_argument("--output", default="bench_results.json",
+                        help="Path to the JSON result file")
+    parser.add_argument("--compare", help="A previous JSON result file")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = {result_key(result): result
+                        for result in json.load(fp)["results"]}
+    results = []
+    for workload in args.workloads:
+        for length in args.lengths:
+            for tot_cols in args.widths:
+                for target in ("engine", "sequence"):
+                    results.append(bench_engine(
+                        workload, tot_cols, length, args.seed,
+                        memory=not args.no_memory, target=target))
+                    print(format_result(
+                        results[-1], baseline.get(result_key(results[-1]))))
+            if not args.no_cli:
+                results.append(bench_cli(workload, length, args.seed))
+                print(format_result(
+                    results[-1], baseline.get(result_key(results[-1]))))
+    with open(args.output, "w") as fp:
+        json.dump({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "results": results,
+        }, fp, indent=2)
+    print("Wrote - {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
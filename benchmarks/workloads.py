@@ -0,0 +1,101 @@
+"""
+Seeded generators of input sequences for the benchmarks.
+
+Every generator yields (shape class, left col) pairs for a grid of the
+given width, the same seed always gives the same sequence.
+"""
+import random
+
+from tetris_engine.shapes import IShape
+from tetris_engine.shapes import JShape
+from tetris_engine.shapes import LShape
+from tetris_engine.shapes import QShape
+from tetris_engine.shapes import SShape
+from tetris_engine.shapes import TShape
+from tetris_engine.shapes import ZShape
+
+SHAPE_CLASSES = (QShape, ZShape, SShape, TShape, IShape, LShape, JShape)
+
+
+def random_sequence(seed, length, tot_cols):
+    """
+    Shapes and columns picked uniformly at random.
+
+    Args:
+        seed (int): The random seed.
+        length (int): The number of inputs.
+        tot_cols (int): Tot columns in the Grid.
+
+    Yields:
+        tuple(type, int): The shape class and its left col.
+    """
+    rnd = random.Random(seed)
+    for _ in range(length):
+        shape_class = rnd.choice(SHAPE_CLASSES)
+        yield shape_class, rnd.randrange(
+            tot_cols - shape_class.table.width + 1)
+
+
+def stack_sequence(seed, length, tot_cols):
+    """
+    Random shapes dropped on the left most columns only, the stack only
+    grows and no row is ever filled.
+
+    Args:
+        seed (int): The random seed.
+        length (int): The number of inputs.
+        tot_cols (int): Tot columns in the Grid.
+
+    Yields:
+        tuple(type, int): The shape class and its left col.
+    """
+    rnd = random.Random(seed)
+    span = min(tot_cols, 6)
+    for _ in range(length):
+        shape_class = rnd.choice(SHAPE_CLASSES)
+        yield shape_class, rnd.randrange(span - shape_class.table.width + 1)
+
+
+def clear_sequence(seed, length, tot_cols):
+    """
+    Q shapes laid side by side, two rows are filled every tot_cols / 2
+    inputs. Columns are visited in a random order per layer. Needs an
+    even number of columns to fill rows.
+
+    Args:
+        seed (int): The random seed.
+        length (int): The number of inputs.
+        tot_cols (int): Tot columns in the Grid.
+
+    Yields:
+        tuple(type, int): The shape class and its left col.
+    """
+    rnd = random.Random(seed)
+    layer = list(range(0, tot_cols - 1, 2))
+    produced = 0
+    while produced < length:
+        rnd.shuffle(layer)
+        for col in layer[:length - produced]:
+            yield QShape, col
+        produced += len(layer)
+
+
+WORKLOADS = {
+    "random": random_sequence,
+    "stack": stack_sequence,
+    "clear": clear_sequence,
+}
+
+
+def format_line(sequence):
+    """
+    Format a sequence as a line of the input file.
+
+    Args:
+        sequence (iterable(tuple(type, int))): The inputs.
+
+    Returns:
+        str: The comma separated inputs (e.g 'Q0,I2').
+    """
+    return ",".join("{}{}".format(shape_class.shape_type, col)
+                    for shape_class, col in sequence)
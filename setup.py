@@ -11,5 +11,10 @@ setup(
     install_requires=['pytest',
                       'mock',
                       ],
-    scripts=["bin/tetris_engine"],
+    extras_require={
+        'numpy': ['numpy'],
+    },
+    entry_points={
+        'console_scripts': ['tetris_engine=tetris_engine.cli:main'],
+    },
 )
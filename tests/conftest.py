@@ -0,0 +1,16 @@
+import pytest
+
+from tetris_engine import shapes
+
+
+@pytest.fixture
+def registry():
+    """
+    Drop the shapes registered by a test at its end.
+    """
+    n_shapes = len(shapes.SHAPE_CLASSES)
+    yield
+    for shape_class in shapes.SHAPE_CLASSES[n_shapes:]:
+        del shapes.SHAPE_IDS[shape_class.shape_type]
+    del shapes.SHAPE_CLASSES[n_shapes:]
+    del shapes.SHAPE_TABLES[n_shapes:]
@@ -0,0 +1,10 @@
+"""
+Lines of input shared by the tests, with their max heights.
+"""
+
+TEST_LINES = [
+    "I0,I4,Q8\n",
+    "T1,Z3,I4\n",
+    "Q0,I2,I6,I0,I6,I6,Q2,Q4\n",
+]
+TEST_HEIGHTS = [1, 4, 3]
@@ -0,0 +1,65 @@
+from tetris_engine.batch import chunk_lines
+from tetris_engine.batch import chunk_runs
+from tetris_engine.batch import run_parallel
+from tetris_engine.batch import run_parallel_file
+from tetris_engine.batch import simulate_lines
+from tetris_engine.parser import parse_codes
+from tetris_engine.sequence_file import SequenceReader
+from tetris_engine.sequence_file import SequenceWriter
+
+from tests.inputs import TEST_HEIGHTS
+from tests.inputs import TEST_LINES
+
+
+def test_simulate_lines_returns_heights():
+    """
+    Test simulate_lines returns the max height of each line.
+    """
+    assert simulate_lines(TEST_LINES) == TEST_HEIGHTS
+
+
+def test_chunk_lines_groups_lines_by_pieces():
+    """
+    Test chunk_lines groups lines until a chunk reaches the number of
+    inputs per chunk, a longer line being a chunk of its own.
+    """
+    chunks = list(chunk_lines(TEST_LINES, chunk_pieces=6))
+    assert chunks == [TEST_LINES[:2], TEST_LINES[2:]]
+    chunks = list(chunk_lines(TEST_LINES[2:] + TEST_LINES, chunk_pieces=6))
+    assert chunks == [TEST_LINES[2:], TEST_LINES[:2], TEST_LINES[2:]]
+
+
+def test_chunk_runs_groups_runs_by_pieces(tmp_path):
+    """
+    Test chunk_runs groups runs by inputs whatever the column size.
+    """
+    for col_size in (1, 2):
+        binary_file = str(tmp_path / "input{}.bin".format(col_size))
+        with SequenceWriter(binary_file, col_size) as writer:
+            for line in TEST_LINES:
+                writer.write_run(parse_codes(line))
+        with SequenceReader(binary_file) as reader:
+            assert list(chunk_runs(reader, chunk_pieces=6)) == [(0, 2),
+                                                                (2, 3)]
+
+
+def test_run_parallel_keeps_input_order():
+    """
+    Test run_parallel yields the heights in the order of the input.
+    """
+    lines = TEST_LINES * 10
+    heights = list(run_parallel(lines, workers=2, chunk_pieces=1))
+    assert heights == TEST_HEIGHTS * 10
+
+
+def test_run_parallel_file_keeps_input_order(tmp_path):
+    """
+    Test run_parallel_file yields the heights of the runs of a binary
+    sequence file in order.
+    """
+    binary_file = str(tmp_path / "input.bin")
+    with SequenceWriter(binary_file) as writer:
+        for line in TEST_LINES * 10:
+            writer.write_run(parse_codes(line))
+    heights = list(run_parallel_file(binary_file, workers=2, chunk_pieces=1))
+    assert heights == TEST_HEIGHTS * 10
@@ -0,0 +1,63 @@
+from tetris_engine import shapes
+from tetris_engine.cache import ResultCache
+from tetris_engine.cache import make_key
+from tetris_engine.shapes import register_shape
+
+TEST_CODES = [(0, 0), (4, 2)]
+
+
+def test_make_key_depends_on_grid_size():
+    """
+    Test the same inputs on grids of different sizes get different keys.
+    """
+    assert make_key(TEST_CODES, None, 10) == make_key(TEST_CODES, None, 10)
+    assert make_key(TEST_CODES, None, 10) != make_key(TEST_CODES, None, 12)
+    assert make_key(TEST_CODES, None, 10) != make_key(TEST_CODES[:1], None, 10)
+
+
+def test_make_key_depends_on_registered_shapes(registry):
+    """
+    Test the same codes get another key once the shapes their ids refer
+    to differ, as custom shapes registered in another order do.
+    """
+    key = make_key(TEST_CODES, None, 10)
+    shape_id, = register_shape("Xa", "##")
+    assert make_key(TEST_CODES, None, 10) != key
+    added_key = make_key([(shape_id, 0)], None, 10)
+    # Another process registering another shape first.
+    del shapes.SHAPE_IDS["Xa"]
+    shapes.SHAPE_CLASSES.pop()
+    shapes.SHAPE_TABLES.pop()
+    assert make_key(TEST_CODES, None, 10) == key
+    assert register_shape("Xb", "#\n#") == [shape_id]
+    assert make_key([(shape_id, 0)], None, 10) != added_key
+
+
+def test_result_cache_evicts_least_recently_used():
+    """
+    Test the cache keeps maxsize results, dropping the least recently
+    used one first.
+    """
+    cache = ResultCache(maxsize=2)
+    cache.put(b"a", 1)
+    cache.put(b"b", 2)
+    assert cache.get(b"a") == 1
+    cache.put(b"c", 3)
+    assert cache.get(b"b") is None
+    assert cache.get(b"a") == 1
+    assert cache.get(b"c") == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_result_cache_persists_on_disk(tmp_path):
+    """
+    Test the results written to the cache file are found by a later
+    cache.
+    """
+    path = str(tmp_path / "cache.db")
+    with ResultCache(path=path) as cache:
+        cache.put(b"a", 1)
+    with ResultCache(path=path) as cache:
+        assert cache.get(b"a") == 1
+        assert cache.get(b"b") is None
+        assert (cache.hits, cache.disk_hits, cache.misses) == (1, 1, 1)
@@ -0,0 +1,134 @@
+import subprocess
+import sys
+
+import pytest
+
+from tetris_engine.cli import main
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine import log
+from tetris_engine.log import set_log_level
+from tetris_engine.pool import ENGINE_POOL
+
+
+# Cumulative import time of tetris_engine.cli, in microseconds. Generous
+# so that a loaded machine does not fail it, a module imported eagerly
+# again (asyncio alone is about 70ms) still does.
+IMPORT_TIME_BUDGET = 150000
+
+
+def run_python(code, *options):
+    """
+    Run code in a new interpreter.
+
+    Returns:
+        subprocess.CompletedProcess: The finished process.
+    """
+    return subprocess.run(
+        [sys.executable] + list(options) + ["-c", code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+
+
+def test_main_writes_heights(tmpdir):
+    """
+    Test main writes the max height of every line of input.
+    """
+    input_file = tmpdir.join("input.txt")
+    input_file.write("Q0\nQ0,Q1\nI0,I4,Q8\n")
+    output_file = tmpdir.join("output.txt")
+    main([str(input_file), str(output_file)])
+    assert output_file.read() == "2\n4\n1\n"
+
+
+def test_main_gives_engine_back(tmpdir):
+    """
+    Test main gives its engine back to the pool, even when a run fails.
+    """
+    input_file = tmpdir.join("input.txt")
+    input_file.write("Q0\n")
+    output_file = tmpdir.join("output.txt")
+    n_idle = len(ENGINE_POOL)
+    main([str(input_file), str(output_file), "--cols", "7"])
+    assert len(ENGINE_POOL) == n_idle + 1
+    input_file.write("Q6\n")
+    with pytest.raises(TetrisEngineException):
+        main([str(input_file), str(output_file), "--cols", "7"])
+    assert len(ENGINE_POOL) == n_idle + 1
+
+
+def test_main_options_match(tmpdir):
+    """
+    Test the trie, cache and sparse options write the same output.
+    """
+    input_file = tmpdir.join("input.txt")
+    input_file.write("T1,Z3,I4\nT1,Z3\nT1,Z3,I4\n")
+    outputs = []
+    for options in ([], ["--trie"], ["--cache"], ["--sparse"]):
+        output_file = tmpdir.join("output{}.txt".format(len(outputs)))
+        main([str(input_file), str(output_file)] + options)
+        outputs.append(output_file.read())
+    assert outputs[0] == outputs[1] == outputs[2] == outputs[3]
+
+
+def test_import_does_not_load_unused_modules():
+    """
+    Test the modules only some options need are not imported at
+    start up.
+    """
+    result = run_python(
+        "import sys, tetris_engine.cli; "
+        "print(' '.join(sorted(sys.modules)))")
+    modules = set(result.stdout.split())
+    for module in ("asyncio", "concurrent.futures", "sqlite3", "numpy",
+                   "logging.handlers", "tetris_engine.service",
+                   "tetris_engine.batch", "tetris_engine.cache",
+                   "tetris_engine.trace"):
+        assert module not in modules
+
+
+def test_import_time_within_budget():
+    """
+    Test the cumulative import time of the command stays in budget.
+    """
+    result = run_python("import tetris_engine.cli", "-X", "importtime")
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if fields[-1] == "tetris_engine.cli":
+            assert int(fields[1]) < IMPORT_TIME_BUDGET
+            return
+    assert False, "tetris_engine.cli not imported"
+
+
+def test_main_stats(tmpdir, capsys):
+    """
+    Test --stats reports the runs without changing the output.
+    """
+    input_file = tmpdir.join("input.txt")
+    input_file.write("Q0\nI0,I4,Q8\n")
+    output_file = tmpdir.join("output.txt")
+    main([str(input_file), str(output_file), "--stats"])
+    assert output_file.read() == "2\n1\n"
+    report = capsys.readouterr().err
+    assert "Pieces: 4" in report
+    assert "Lines cleared: 1" in report
+
+
+def test_main_stats_with_debug_logging(tmpdir, capsys):
+    """
+    Test --stats still times the runs when every input is logged.
+    """
+    input_file = tmpdir.join("input.txt")
+    input_file.write("Q0\nI0,I4,Q8\n")
+    output_file = tmpdir.join("output.txt")
+    log_level = log.LOG_LEVEL
+    try:
+        main([str(input_file), str(output_file), "--stats", "-vv"])
+    finally:
+        set_log_level(log_level)
+    assert output_file.read() == "2\n1\n"
+    captured = capsys.readouterr()
+    # main writes out the queued records before it returns.
+    assert "Placed I4 at row 0" in captured.out
+    report = captured.err
+    assert "Runs: 2 simulated, 0 skipped" in report
+    assert "Lines cleared: 1" in report
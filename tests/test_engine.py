@@ -4,7 +4,13 @@ import mock
 from tetris_engine.engine import TetrisEngine
 from tetris_engine.engine import State
 from tetris_engine.engine import HEIGHT_INIT
+from tetris_engine.engine import GRID_MAX_ROWS
+from tetris_engine.exceptions import TetrisEngineException
 from tetris_engine.shapes import Coordinate, InShape
+from tetris_engine.shapes import compile_shape
+from tetris_engine.shapes import QShape
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.shapes import TShape
 
 TEST_MAX_ROWS = TEST_MAX_COLS = 3
 
@@ -17,6 +23,13 @@ def grid():
     return test_grid
 
 
+def grid_states(engine):
+    """Returns the grid of the engine as a list of lists of State."""
+    rows = engine.rows if engine.rows is not None else engine.height
+    return [[engine.get_state(Coordinate(row, col))
+             for col in range(engine.cols)] for row in range(rows)]
+
+
 @pytest.fixture(scope='function')
 def engine():
     test_engine = TetrisEngine(TEST_MAX_ROWS, TEST_MAX_COLS)
@@ -32,7 +45,7 @@ def test_engine_initialize_grid_is_unoccupied(grid, engine):
     assert not engine._grid
     engine.initialize()
     # post initialize it should be unoccupied.
-    assert engine._grid == grid
+    assert grid_states(engine) == grid
     # max height is 0
     assert engine.height == (HEIGHT_INIT + 1)
 
@@ -90,17 +103,13 @@ def test_mark_coords_occupied_by_shape_marks_occupied(engine):
     ]
     # Test that initially its UNOCCUPIED
     for coord in coords:
-        row = coord.row
-        col = coord.col
-        assert engine._grid[row][col] == State.UNOCCUPIED
+        assert engine.get_state(coord) == State.UNOCCUPIED
 
     engine.mark_coords_occupied_by_shape(coords)
 
     # Test that its now OCCUPIED
     for coord in coords:
-        row = coord.row
-        col = coord.col
-        assert engine._grid[row][col] == State.OCCUPIED
+        assert engine.get_state(coord) == State.OCCUPIED
 
 
 def test_mark_coords_occupied_by_shape_marks_blocked(engine):
@@ -114,18 +123,18 @@ def test_mark_coords_occupied_by_shape_marks_blocked(engine):
         Coordinate(1, 1),
     ]
     # Test that initially its UNOCCUPIED
-    assert engine._grid[1][0] == State.UNOCCUPIED
-    assert engine._grid[1][1] == State.UNOCCUPIED
+    assert engine.get_state(Coordinate(1, 0)) == State.UNOCCUPIED
+    assert engine.get_state(Coordinate(1, 1)) == State.UNOCCUPIED
 
     engine.mark_coords_occupied_by_shape(coords)
 
     # Test that its now OCCUPIED
-    assert engine._grid[1][0] == State.OCCUPIED
-    assert engine._grid[1][1] == State.OCCUPIED
+    assert engine.get_state(Coordinate(1, 0)) == State.OCCUPIED
+    assert engine.get_state(Coordinate(1, 1)) == State.OCCUPIED
 
     # Test that coordinates lower to it are now blocked.
-    assert engine._grid[0][0] == State.BLOCKED
-    assert engine._grid[0][1] == State.BLOCKED
+    assert engine.get_state(Coordinate(0, 0)) == State.BLOCKED
+    assert engine.get_state(Coordinate(0, 1)) == State.BLOCKED
 
     coords = [
         Coordinate(2, 1),
@@ -133,20 +142,20 @@ def test_mark_coords_occupied_by_shape_marks_blocked(engine):
     ]
 
     # Test that initially its UNOCCUPIED
-    assert engine._grid[2][1] == State.UNOCCUPIED
-    assert engine._grid[2][2] == State.UNOCCUPIED
+    assert engine.get_state(Coordinate(2, 1)) == State.UNOCCUPIED
+    assert engine.get_state(Coordinate(2, 2)) == State.UNOCCUPIED
 
     engine.mark_coords_occupied_by_shape(coords)
 
     # Test that its now OCCUPIED
-    assert engine._grid[2][1] == State.OCCUPIED
-    assert engine._grid[2][2] == State.OCCUPIED
+    assert engine.get_state(Coordinate(2, 1)) == State.OCCUPIED
+    assert engine.get_state(Coordinate(2, 2)) == State.OCCUPIED
 
     # Test that it lower one are blocked except which
     # were already occupied.
-    assert engine._grid[1][1] == State.OCCUPIED
-    assert engine._grid[1][2] == State.BLOCKED
-    assert engine._grid[0][2] == State.BLOCKED
+    assert engine.get_state(Coordinate(1, 1)) == State.OCCUPIED
+    assert engine.get_state(Coordinate(1, 2)) == State.BLOCKED
+    assert engine.get_state(Coordinate(0, 2)) == State.BLOCKED
 
 
 def test_remove_rows_shifts_rows_below(engine):
@@ -162,25 +171,21 @@ def test_remove_rows_shifts_rows_below(engine):
         Coordinate(0, 0),
     ]
 
-    # set the coords to occupied
-    for coord in coords:
-        row = coord.row
-        col = coord.col
-        engine._grid[row][col] = State.OCCUPIED
-    # set the expect coords to blocked.
-    engine._grid[0][1] = State.BLOCKED
-    engine._grid[0][2] = State.BLOCKED
+    # set the coords to occupied, and the ones under them to blocked.
+    engine.mark_coords_occupied_by_shape(coords)
+    states = grid_states(engine)
     # keep a copy of the row that will be shifted down
-    row_idx2 = engine._grid[2][:]
+    row_idx2 = states[2]
     # keep a copy of the row that is not to be shifted
-    row_idx0 = engine._grid[0][:]
+    row_idx0 = states[0]
 
     # make sure to update the height
     engine.update_height(Coordinate(2, 1))
     old_height = engine.height
     engine.check_and_remove_filled_rows()
-    assert engine._grid[1] == row_idx2
-    assert engine._grid[0] == row_idx0
+    states = grid_states(engine)
+    assert states[1] == row_idx2
+    assert states[0] == row_idx0
     # make sure the height is reduced as well.
     assert engine.height == old_height - 1
 
@@ -192,19 +197,211 @@ def test_process_input_place_shape(engine):
     """
     engine.initialize()
     input_shape = mock.Mock(spec=InShape)
-    coords = [
-        Coordinate(2, 1),
-        Coordinate(1, 0),
-        Coordinate(1, 1),
-    ]
-    mock_highest_unoccupied_row = mock.Mock()
-    input_shape.get_coordinates.return_value = coords
-    mock_highest_unoccupied_row.return_value = 2
+    input_shape.table = compile_shape(((0, 1), (1, 0), (1, 1)))
     # This should make it place at row 2
-    engine.get_highest_unoccupied_row = mock_highest_unoccupied_row
+    engine.mark_coords_occupied_by_shape([Coordinate(0, 0)])
     # Try to place this shape at col 0
     place_col = 0
     input_shape.left_col = place_col
     placed_coord = engine.process_input(input_shape)
     assert placed_coord == Coordinate(2, place_col)
     assert engine.height == 3
+
+
+def test_process_input_raises_when_shape_does_not_fit(engine):
+    """
+    Test that process_input raises for a shape that does not fit in
+    the columns of the grid.
+    """
+    engine.initialize()
+    with pytest.raises(TetrisEngineException):
+        engine.process_input(TShape(TEST_MAX_COLS - 2))
+
+
+def test_process_input_stacks_beyond_max_rows():
+    """
+    Test that an engine without a height limit keeps stacking shapes
+    and clearing rows past GRID_MAX_ROWS.
+    """
+    engine = TetrisEngine(tot_rows=None, tot_cols=4)
+    engine.initialize()
+    for _ in range(GRID_MAX_ROWS * 3):
+        engine.process_input(QShape(0))
+    assert engine.height == GRID_MAX_ROWS * 6
+    # Fill the right half of the bottom most two rows.
+    engine.process_input(QShape(2))
+    assert engine.height == GRID_MAX_ROWS * 6 - 2
+    assert engine.get_state(Coordinate(0, 2)) == State.UNOCCUPIED
+    assert engine.get_state(Coordinate(0, 0)) == State.OCCUPIED
+
+
+def test_check_and_remove_filled_rows_removes_all_filled_rows(engine):
+    """
+    Test that all the filled rows in the checked range are removed
+    in one go.
+    """
+    engine.initialize()
+    coords = [Coordinate(row, col) for row in range(2)
+              for col in range(TEST_MAX_COLS)]
+    coords.append(Coordinate(2, 1))
+    engine.mark_coords_occupied_by_shape(coords)
+    engine.update_height(Coordinate(2, 1))
+    engine.check_and_remove_filled_rows(0, 1)
+    assert engine.height == 1
+    assert grid_states(engine)[0] == [
+        State.UNOCCUPIED, State.OCCUPIED, State.UNOCCUPIED]
+
+
+def test_place_places_shape_by_code(engine):
+    """
+    Test place takes a (shape id, col) code and returns the row the
+    shape is placed at.
+    """
+    engine.initialize()
+    assert engine.place(SHAPE_IDS["Q"], 0) == 1
+    assert engine.height == 2
+    with pytest.raises(TetrisEngineException):
+        engine.place(SHAPE_IDS["Q"], 1)
+
+
+def test_clone_is_independent():
+    """
+    Test a clone continues from the state of the engine without
+    changing it.
+    """
+    engine = TetrisEngine(tot_rows=None, tot_cols=TEST_MAX_COLS)
+    engine.initialize()
+    engine.process_input(QShape(0))
+    clone = engine.clone()
+    clone.process_input(QShape(0))
+    assert engine.height == 2
+    assert clone.height == 4
+    assert engine.get_state(Coordinate(3, 1)) == State.UNOCCUPIED
+    assert clone.get_state(Coordinate(3, 1)) == State.OCCUPIED
+
+
+def test_snapshot_restore():
+    """
+    Test an engine restored from a snapshot has the same state.
+    """
+    engine = TetrisEngine(tot_rows=None, tot_cols=12)
+    engine.initialize()
+    for col in (0, 3, 5, 8, 0):
+        engine.process_input(QShape(col))
+    restored = TetrisEngine()
+    restored.restore(engine.snapshot())
+    assert restored.rows is None
+    assert restored.cols == 12
+    assert restored.height == engine.height
+    assert grid_states(restored) == grid_states(engine)
+    assert restored.process_input(TShape(2)) == engine.process_input(
+        TShape(2))
+
+
+def test_restore_rejects_invalid_snapshot():
+    """
+    Test a truncated snapshot, or one inconsistent with its tot rows, is
+    rejected without changing the engine.
+    """
+    engine = TetrisEngine(tot_rows=4, tot_cols=12)
+    engine.initialize()
+    engine.process_input(QShape(0))
+    snapshot = engine.snapshot()
+    restored = TetrisEngine(tot_rows=None, tot_cols=3)
+    restored.initialize()
+    for invalid in (snapshot[:-1], snapshot + b"\0", snapshot[:20]):
+        with pytest.raises(TetrisEngineException):
+            restored.restore(invalid)
+    # The same board with tot rows lower than its height.
+    too_high = bytearray(snapshot)
+    too_high[8:16] = (1).to_bytes(8, "little")
+    with pytest.raises(TetrisEngineException):
+        restored.restore(bytes(too_high))
+    assert restored.cols == 3
+    restored.restore(snapshot)
+    assert restored.height == 2
+
+
+def test_initialize_resets_touched_columns():
+    """
+    Test initialize after a run leaves the engine as a new one, also
+    after a restore and a row removal.
+    """
+    engine = TetrisEngine(tot_rows=None, tot_cols=12)
+    engine.initialize()
+    for col in (4, 6, 6):
+        engine.process_input(QShape(col))
+    engine.remove_row(0)
+    engine.initialize()
+    assert grid_states(engine) == grid_states(TetrisEngine(tot_rows=None,
+                                                           tot_cols=12))
+    assert engine.height == 0
+    engine.process_input(TShape(9))
+    restored = TetrisEngine(tot_rows=None, tot_cols=12)
+    restored.restore(engine.snapshot())
+    restored.initialize()
+    assert restored.get_highest_unoccupied_row(10) == 0
+    assert restored.process_input(QShape(0)) == Coordinate(1, 0)
+
+
+def test_run_sequence_matches_place():
+    """
+    Test run_sequence places shapes like place does, clearing rows.
+    """
+    codes = [(SHAPE_IDS["I"], 0), (SHAPE_IDS["I"], 4), (SHAPE_IDS["Q"], 8),
+             (SHAPE_IDS["T"], 1), (SHAPE_IDS["Q"], 8)]
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    engine.initialize()
+    rows = []
+    expected_heights = []
+    for shape_id, col in codes:
+        rows.append(engine.place(shape_id, col))
+        expected_heights.append(engine.height)
+    batch = TetrisEngine(tot_rows=None, tot_cols=10)
+    batch.initialize()
+    landing_rows = []
+    heights = []
+    assert batch.run_sequence(codes, landing_rows, heights) == engine.height
+    assert landing_rows == rows
+    assert heights == expected_heights
+    assert heights[2] == 1
+    assert grid_states(batch) == grid_states(engine)
+
+
+def test_run_sequence_raises_when_shape_does_not_fit():
+    """
+    Test run_sequence keeps the shapes placed before the one that
+    does not fit.
+    """
+    engine = TetrisEngine(tot_rows=2, tot_cols=TEST_MAX_COLS)
+    engine.initialize()
+    with pytest.raises(TetrisEngineException):
+        engine.run_sequence([(SHAPE_IDS["Q"], 0), (SHAPE_IDS["Q"], 1)])
+    assert engine.height == 2
+
+
+def test_stats_counts_across_runs():
+    """
+    Test the counters of stats are kept across initialize and count
+    the placements of place and run_sequence alike.
+    """
+    engine = TetrisEngine(tot_rows=2, tot_cols=10)
+    engine.initialize()
+    engine.place(SHAPE_IDS["I"], 0)
+    engine.place(SHAPE_IDS["I"], 4)
+    engine.place(SHAPE_IDS["Q"], 8)
+    engine.initialize()
+    with pytest.raises(TetrisEngineException):
+        engine.run_sequence([(SHAPE_IDS["Q"], 0), (SHAPE_IDS["Q"], 0)])
+    assert engine.stats() == {
+        "pieces_placed": 4,
+        "rows_cleared": 1,
+        "probe_iterations": 12,
+        "overflow_errors": 1,
+        "peak_height": 2,
+    }
+    clone = engine.clone()
+    clone.place(SHAPE_IDS["Q"], 4)
+    assert clone.stats()["pieces_placed"] == 1
+    engine.add_counters(clone)
+    assert engine.stats()["pieces_placed"] == 5
@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine.shapes import IShape
+from tetris_engine.shapes import JShape
+from tetris_engine.shapes import LShape
+from tetris_engine.shapes import QShape
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.shapes import SShape
+from tetris_engine.shapes import TShape
+from tetris_engine.shapes import ZShape
+
+np = pytest.importorskip("numpy")
+
+from tetris_engine.lockstep import pack_arrays  # noqa: E402
+from tetris_engine.lockstep import pack_codes  # noqa: E402
+from tetris_engine.lockstep import run_lockstep  # noqa: E402
+from tetris_engine.lockstep import run_lockstep_arrays  # noqa: E402
+from tetris_engine.sequence_file import SequenceReader  # noqa: E402
+from tetris_engine.sequence_file import SequenceWriter  # noqa: E402
+
+SHAPE_CLASSES = [QShape, ZShape, SShape, TShape, IShape, LShape, JShape]
+
+
+def random_runs(seed, tot_cols, n_runs=200, max_len=60):
+    rnd = random.Random(seed)
+    runs = []
+    for _ in range(n_runs):
+        run = []
+        for _ in range(rnd.randrange(max_len)):
+            shape_class = rnd.choice(SHAPE_CLASSES)
+            max_col = tot_cols - shape_class.table.width
+            run.append(shape_class(rnd.randrange(max_col + 1)))
+        runs.append(run)
+    return runs
+
+
+def engine_heights(runs, tot_rows, tot_cols):
+    heights = []
+    failed = []
+    engine = TetrisEngine(tot_rows, tot_cols)
+    for run in runs:
+        engine.initialize()
+        run_failed = False
+        for input_shape in run:
+            try:
+                engine.process_input(input_shape)
+            except TetrisEngineException:
+                run_failed = True
+                break
+        heights.append(engine.height)
+        failed.append(run_failed)
+    return heights, failed
+
+
+@pytest.mark.parametrize("tot_rows,tot_cols", [(10, 10), (None, 5)])
+def test_run_lockstep_matches_engine(tot_rows, tot_cols):
+    """
+    Test run_lockstep gives the same heights as TetrisEngine, including
+    for the runs stopped by an input which cannot be placed.
+    """
+    runs = random_runs(tot_cols, tot_cols)
+    heights, failed = run_lockstep(runs, tot_rows, tot_cols)
+    expected_heights, expected_failed = engine_heights(
+        runs, tot_rows, tot_cols)
+    assert heights.tolist() == expected_heights
+    assert failed.tolist() == expected_failed
+
+
+def test_run_lockstep_masks_out_finished_runs():
+    """
+    Test shorter runs keep their height once they are over.
+    """
+    runs = [[IShape(0)], [IShape(0), IShape(0), IShape(0)], []]
+    heights, failed = run_lockstep(runs)
+    assert heights.tolist() == [1, 3, 0]
+    assert not failed.any()
+
+
+def test_run_lockstep_codes_and_arrays(tmpdir):
+    """
+    Test runs of codes and runs read from a sequence file give the same
+    heights as runs of InShape.
+    """
+    runs = random_runs(1, 10, n_runs=50)
+    codes = [[(SHAPE_IDS[input_shape.shape_type], input_shape.left_col)
+              for input_shape in run] for run in runs]
+    heights, failed = run_lockstep(runs, None, 10)
+    code_heights, code_failed = run_lockstep(codes, None, 10)
+    assert code_heights.tolist() == heights.tolist()
+    assert code_failed.tolist() == failed.tolist()
+    file_path = str(tmpdir.join("runs.bin"))
+    with SequenceWriter(file_path) as writer:
+        for run in codes:
+            writer.write_run(run)
+    with SequenceReader(file_path) as reader:
+        packed = pack_arrays([reader.get_run(run_idx)
+                              for run_idx in range(len(reader))])
+        array_heights, _ = run_lockstep_arrays(*packed, tot_rows=None,
+                                               tot_cols=10)
+        del packed
+    assert array_heights.tolist() == heights.tolist()
+
+
+def test_pack_codes_pads_runs():
+    """
+    Test pack_codes lays out one run per row, padded with zeros.
+    """
+    shape_ids, cols, lengths = pack_codes([[(4, 1), (0, 2)], [], [(3, 5)]])
+    assert shape_ids.tolist() == [[4, 0], [0, 0], [3, 0]]
+    assert cols.tolist() == [[1, 2], [0, 0], [5, 0]]
+    assert lengths.tolist() == [2, 0, 1]
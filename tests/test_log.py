@@ -0,0 +1,63 @@
+import logging
+
+import mock
+
+from tetris_engine import log
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.log import HANDLER
+from tetris_engine.log import get_logger
+from tetris_engine.log import set_log_level
+from tetris_engine.shapes import QShape
+
+
+def test_get_logger_adds_handler_once():
+    """
+    Test get_logger does not add a handler on every call.
+    """
+    logger = get_logger("test_log")
+    logger = get_logger("test_log")
+    assert logger.handlers == [HANDLER]
+
+
+def test_set_log_level_sets_level_of_loggers():
+    """
+    Test set_log_level updates the loggers handed out by get_logger.
+    """
+    logger = get_logger("test_log")
+    prev_level = log.LOG_LEVEL
+    set_log_level(logging.INFO)
+    try:
+        assert logger.getEffectiveLevel() == logging.INFO
+    finally:
+        set_log_level(prev_level)
+    assert logger.getEffectiveLevel() == prev_level
+
+
+def test_process_input_does_not_format_when_quiet():
+    """
+    Test the placement log message is not formatted unless DEBUG
+    is enabled.
+    """
+    engine = TetrisEngine()
+    engine.initialize()
+    with mock.patch.object(QShape, "__repr__") as mock_repr:
+        engine.process_input(QShape(0))
+    assert not mock_repr.called
+
+
+def test_flush_writes_queued_records(capsys):
+    """
+    Test flushing the handler writes out the queued records and the
+    next record is written to the current stdout.
+    """
+    logger = get_logger("test_log")
+    prev_level = log.LOG_LEVEL
+    set_log_level(logging.INFO)
+    try:
+        logger.info("first record")
+        HANDLER.flush()
+        assert "first record" in capsys.readouterr().out
+        logger.info("second record")
+    finally:
+        set_log_level(prev_level)
+    assert "second record" in capsys.readouterr().out
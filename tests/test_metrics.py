@@ -0,0 +1,58 @@
+from urllib.request import urlopen
+
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.metrics import MetricsExporter
+from tetris_engine.metrics import format_metrics
+from tetris_engine.metrics import merge_stats
+from tetris_engine.shapes import SHAPE_IDS
+
+
+def played_engine():
+    """
+    Returns an engine that placed three shapes and cleared a row.
+    """
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    engine.initialize()
+    engine.run_sequence([(SHAPE_IDS["I"], 0), (SHAPE_IDS["I"], 4),
+                         (SHAPE_IDS["Q"], 8)])
+    return engine
+
+
+def test_format_metrics():
+    """
+    Test the stats are formatted in the Prometheus text format.
+    """
+    text = format_metrics(played_engine().stats())
+    assert "# TYPE tetris_engine_pieces_placed_total counter\n" in text
+    assert "\ntetris_engine_pieces_placed_total 3\n" in text
+    assert "\ntetris_engine_rows_cleared_total 1\n" in text
+    assert "# TYPE tetris_engine_peak_height gauge\n" in text
+    assert "\ntetris_engine_peak_height 2\n" in text
+
+
+def test_merge_stats():
+    """
+    Test merging adds up counters and keeps the highest peak height.
+    """
+    engine = played_engine()
+    other = TetrisEngine(tot_rows=None, tot_cols=10)
+    other.initialize()
+    other.run_sequence([(SHAPE_IDS["L"], 0)])
+    merged = merge_stats([engine.stats(), other.stats()])
+    assert merged["pieces_placed"] == 4
+    assert merged["peak_height"] == 3
+
+
+def test_exporter_writes_file_and_serves(tmpdir):
+    """
+    Test the exporter writes the metrics file and serves /metrics.
+    """
+    engine = played_engine()
+    metrics_file = tmpdir.join("engine.prom")
+    with MetricsExporter(engine.stats, str(metrics_file), port=0) as exporter:
+        url = "http://127.0.0.1:{}/metrics".format(exporter.port)
+        assert urlopen(url).read().decode() == \
+            format_metrics(engine.stats())
+        engine.place(SHAPE_IDS["T"], 0)
+    assert metrics_file.read() == format_metrics(engine.stats())
+    assert "tetris_engine_pieces_placed_total 4\n" in metrics_file.read()
@@ -0,0 +1,47 @@
+import pytest
+
+from tetris_engine.parser import get_input_shape
+from tetris_engine.parser import parse_codes
+from tetris_engine.parser import parse_line
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.shapes import IShape
+from tetris_engine.shapes import QShape
+
+
+def test_parse_codes_supports_multi_digit_cols():
+    """
+    Test parse_codes returns (shape id, col) codes, for columns of
+    more than one digit too.
+    """
+    assert parse_codes("Q0,I12,J105\n") == [
+        (SHAPE_IDS["Q"], 0),
+        (SHAPE_IDS["I"], 12),
+        (SHAPE_IDS["J"], 105),
+    ]
+
+
+@pytest.mark.parametrize("line", ["X1", "Q", "Q1a", "Q0,,I2", ""])
+def test_parse_codes_raises_for_invalid_input(line):
+    """
+    Test parse_codes raises IOError for an invalid input.
+    """
+    with pytest.raises(IOError):
+        parse_codes(line)
+
+
+def test_parse_line_returns_shapes():
+    """
+    Test parse_line returns the InShape of each input.
+    """
+    shapes = parse_line("Q0,I12")
+    assert [type(shape) for shape in shapes] == [QShape, IShape]
+    assert [shape.left_col for shape in shapes] == [0, 12]
+
+
+def test_get_input_shape():
+    """
+    Test get_input_shape returns an InShape at the given col.
+    """
+    shape = get_input_shape("I10")
+    assert isinstance(shape, IShape)
+    assert shape.left_col == 10
@@ -0,0 +1,55 @@
+from tetris_engine.pool import EnginePool
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.sparse import SparseTetrisEngine
+
+
+def test_acquire_reuses_released_engine():
+    """
+    Test an engine given back is handed out again, reset, for the same
+    grid size only.
+    """
+    pool = EnginePool()
+    engine = pool.acquire(tot_rows=None, tot_cols=6)
+    engine.place(SHAPE_IDS["Q"], 0)
+    pool.release(engine)
+    assert len(pool) == 1
+    assert pool.acquire(tot_rows=None, tot_cols=8) is not engine
+    reused = pool.acquire(tot_rows=None, tot_cols=6)
+    assert reused is engine
+    assert reused.height == 0
+    assert len(pool) == 0
+
+
+def test_release_keeps_at_most_max_idle():
+    """
+    Test the pool drops the engines given back beyond max_idle.
+    """
+    pool = EnginePool(max_idle=2)
+    engines = [pool.acquire() for _ in range(3)]
+    for engine in engines:
+        pool.release(engine)
+    assert len(pool) == 2
+
+
+def test_borrow_releases_engine():
+    """
+    Test an engine borrowed in a with block is given back at its end.
+    """
+    pool = EnginePool()
+    with pool.borrow(tot_cols=4) as engine:
+        assert engine.cols == 4
+        assert len(pool) == 0
+    assert len(pool) == 1
+
+
+def test_acquire_keeps_engine_classes_apart():
+    """
+    Test an engine given back is only handed out for its own class.
+    """
+    pool = EnginePool()
+    engine = pool.acquire(tot_rows=None, tot_cols=6)
+    pool.release(engine)
+    sparse = pool.acquire(tot_rows=None, tot_cols=6,
+                          engine_class=SparseTetrisEngine)
+    assert isinstance(sparse, SparseTetrisEngine)
+    assert pool.acquire(tot_rows=None, tot_cols=6) is engine
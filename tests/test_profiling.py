@@ -0,0 +1,74 @@
+import pstats
+
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.profiling import RunStats
+from tetris_engine.profiling import percentile
+from tetris_engine.profiling import profile_to
+from tetris_engine.shapes import SHAPE_IDS
+
+
+def test_percentile():
+    """
+    Test percentile returns the nearest rank value.
+    """
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) == 0.0
+
+
+def test_run_stats_counts_pieces_and_lines():
+    """
+    Test RunStats counts the pieces and removed rows of every run, and
+    reports the slowest ones.
+    """
+    stats = RunStats(top_runs=1)
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    for seconds, codes in ((0.5, [(SHAPE_IDS["I"], 0), (SHAPE_IDS["I"], 4),
+                                  (SHAPE_IDS["Q"], 8)]),
+                           (2.0, [(SHAPE_IDS["Q"], 0)])):
+        engine.initialize()
+        rows_cleared = engine.n_rows_cleared
+        engine.run_sequence(codes)
+        stats.add_run(seconds, codes, engine.n_rows_cleared - rows_cleared)
+    stats.skip_run()
+    assert stats.pieces == 4
+    assert stats.lines_cleared == 1
+    report = stats.report()
+    assert "Runs: 2 simulated, 1 skipped" in report
+    assert "max 2000000.0us" in report
+    assert "line 2: 2000000.0us, 1 pieces" in report
+    assert "line 1:" not in report
+
+
+def test_timed_adds_to_phase():
+    """
+    Test timed yields the items and adds their time to the phase.
+    """
+    stats = RunStats()
+    assert list(stats.timed(iter([1, 2]), "parse")) == [1, 2]
+    assert stats.phases["parse"] > 0
+
+
+def test_profile_to_writes_profile(tmpdir):
+    """
+    Test profile_to writes a cProfile dump and collapsed stacks.
+    """
+    def spin():
+        for _ in range(200):
+            engine = TetrisEngine(tot_rows=None)
+            engine.initialize()
+            engine.run_sequence([(SHAPE_IDS["T"], 0)] * 50)
+
+    dump = tmpdir.join("run.prof")
+    with profile_to(str(dump)):
+        spin()
+    assert pstats.Stats(str(dump)).total_calls > 0
+    folded = tmpdir.join("run.folded")
+    with profile_to(str(folded), "collapsed"):
+        spin()
+    for line in folded.read().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack.split(";")[-1].count(":") == 1
+        assert int(count) > 0
@@ -0,0 +1,84 @@
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.search import BeamSearch
+from tetris_engine.search import best_placement
+from tetris_engine.search import score_columns
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.sparse import SparseTetrisEngine
+
+
+def new_engine(codes=(), engine_class=TetrisEngine):
+    """
+    Returns a 10 column engine with the given codes placed.
+    """
+    engine = engine_class(tot_rows=None, tot_cols=10)
+    engine.initialize()
+    engine.run_sequence(codes)
+    return engine
+
+
+def test_score_columns_scores_every_legal_column():
+    """
+    Test every column a shape fits in is scored, the same on an empty
+    grid.
+    """
+    scores = score_columns(new_engine(), [SHAPE_IDS["I"]])
+    assert sorted(scores) == list(range(7))
+    assert len(set(scores.values())) == 1
+
+
+def test_best_placement_clears_row():
+    """
+    Test the best placement completes a row, and leaves the board
+    unchanged.
+    """
+    engine = new_engine([(SHAPE_IDS["I"], 0), (SHAPE_IDS["I"], 4)])
+    key = engine.board_key()
+    assert best_placement(engine, [SHAPE_IDS["Q"]]) == (8, 2.0)
+    assert engine.board_key() == key
+
+
+def test_best_placement_avoids_holes():
+    """
+    Test the look ahead avoids a placement leaving holes.
+    """
+    engine = new_engine([(SHAPE_IDS["Q"], 0)])
+    col, _ = best_placement(engine, [SHAPE_IDS["T"], SHAPE_IDS["I"]])
+    assert col != 0
+
+
+def test_search_reuses_boards_reached_twice():
+    """
+    Test the transposition table measures a board reached by several
+    paths once.
+    """
+    search = BeamSearch(depth=2)
+    search.score_columns(new_engine(), [SHAPE_IDS["I"], SHAPE_IDS["I"]])
+    assert search.n_table_hits > 0
+    assert len(search.table) < search.n_nodes
+
+
+def test_score_columns_in_processes():
+    """
+    Test spreading the columns across processes gives the same scores.
+    """
+    engine = new_engine([(SHAPE_IDS["T"], 3), (SHAPE_IDS["Z"], 6)])
+    shape_ids = [SHAPE_IDS["S"], SHAPE_IDS["L"], SHAPE_IDS["J"]]
+    assert score_columns(engine, shape_ids, depth=3, workers=2) == \
+        score_columns(engine, shape_ids, depth=3)
+
+
+def test_search_same_on_sparse_engine():
+    """
+    Test the sparse engine gives the same features and scores, also
+    from worker processes.
+    """
+    codes = [(SHAPE_IDS["T"], 3), (SHAPE_IDS["Z"], 6), (SHAPE_IDS["Q"], 0)]
+    dense = new_engine(codes)
+    sparse = new_engine(codes, SparseTetrisEngine)
+    assert sparse.column_heights() == dense.column_heights()
+    assert BeamSearch().get_features(sparse) == \
+        BeamSearch().get_features(dense)
+    shape_ids = [SHAPE_IDS["S"], SHAPE_IDS["L"], SHAPE_IDS["J"]]
+    expected = score_columns(dense, shape_ids, depth=3)
+    assert score_columns(sparse, shape_ids, depth=3) == expected
+    assert score_columns(sparse, shape_ids, depth=3, workers=2) == expected
@@ -0,0 +1,103 @@
+import struct
+
+import pytest
+
+from tetris_engine.parser import parse_codes
+from tetris_engine.sequence_file import HEADER
+from tetris_engine.sequence_file import SequenceReader
+from tetris_engine.sequence_file import SequenceWriter
+from tetris_engine.sequence_file import binary_to_text
+from tetris_engine.sequence_file import is_sequence_file
+from tetris_engine.sequence_file import text_to_binary
+
+from tests.inputs import TEST_LINES
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_text("".join(TEST_LINES))
+    return str(path)
+
+
+def test_text_to_binary_round_trip(text_file, tmp_path):
+    """
+    Test converting to the binary format and back gives the same file.
+    """
+    binary_file = str(tmp_path / "input.bin")
+    round_trip_file = str(tmp_path / "round_trip.txt")
+    text_to_binary(text_file, binary_file)
+    assert is_sequence_file(binary_file)
+    assert not is_sequence_file(text_file)
+    binary_to_text(binary_file, round_trip_file)
+    with open(round_trip_file) as fp:
+        assert fp.read() == "".join(TEST_LINES)
+
+
+def test_get_run_jumps_to_run(text_file, tmp_path):
+    """
+    Test get_run returns the inputs of any run.
+    """
+    binary_file = str(tmp_path / "input.bin")
+    text_to_binary(text_file, binary_file)
+    with SequenceReader(binary_file) as reader:
+        assert len(reader) == len(TEST_LINES)
+        shape_ids, cols = reader.get_run(2)
+        assert list(zip(shape_ids, cols)) == parse_codes(TEST_LINES[2])
+        with pytest.raises(IndexError):
+            reader.get_run(len(TEST_LINES))
+
+
+def test_wide_cols(tmp_path):
+    """
+    Test columns past 255 need 2 bytes per column.
+    """
+    binary_file = str(tmp_path / "input.bin")
+    codes = [(0, 0), (4, 300), (6, 65535)]
+    with pytest.raises(IOError):
+        with SequenceWriter(binary_file, col_size=1) as writer:
+            writer.write_run(codes)
+    # The half written file is removed.
+    assert not (tmp_path / "input.bin").exists()
+    with SequenceWriter(binary_file, col_size=2) as writer:
+        writer.write_run(codes)
+        writer.write_run([])
+    with SequenceReader(binary_file) as reader:
+        assert [list(run) for run in reader.iter_runs()] == [codes, []]
+
+
+def test_reader_rejects_corrupt_files(text_file, tmp_path):
+    """
+    Test truncated files and files with a bad header or run offsets are
+    rejected with the error of a file that is not a sequence file.
+    """
+    binary_file = tmp_path / "input.bin"
+    text_to_binary(text_file, str(binary_file))
+    data = binary_file.read_bytes()
+    bad_file = tmp_path / "bad.bin"
+    bad_col_size = data[:5] + b"\x03" + data[6:]
+    # The offset of the second run, past the end of the runs.
+    bad_offset = bytearray(data)
+    struct.pack_into("<Q", bad_offset, len(data) - 8 * len(TEST_LINES),
+                     len(data))
+    for bad_data in (b"", data[:-1], data[:HEADER.size + 3], bad_col_size):
+        bad_file.write_bytes(bad_data)
+        with pytest.raises(IOError, match="not a sequence file"):
+            SequenceReader(str(bad_file))
+    bad_file.write_bytes(bytes(bad_offset))
+    with SequenceReader(str(bad_file)) as reader:
+        with pytest.raises(IOError, match="not a sequence file"):
+            reader.get_run(0)
+
+
+def test_text_to_binary_removes_file_on_error(tmp_path):
+    """
+    Test a text file that fails to parse does not leave a binary file
+    that looks good.
+    """
+    text_file = tmp_path / "input.txt"
+    text_file.write_text(TEST_LINES[0] + "X9\n")
+    binary_file = tmp_path / "input.bin"
+    with pytest.raises(IOError):
+        text_to_binary(str(text_file), str(binary_file))
+    assert not binary_file.exists()
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+
+import mock
+import pytest
+
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.service import EngineService
+from tetris_engine.service import run_client
+
+from tests.inputs import TEST_HEIGHTS
+from tests.inputs import TEST_LINES
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    """
+    Runs an EngineService on a Unix socket in a background thread.
+    """
+    path = str(tmp_path / "engine.sock")
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(EngineService(pool_size=2).start(path))
+        started.set()
+        loop.run_forever()
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.close()
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait()
+    yield path
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+def test_run_client_writes_heights(socket_path, tmp_path):
+    """
+    Test the client writes the height of each line, like the CLI.
+    """
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("".join(TEST_LINES * 50))
+    output_file = tmp_path / "output.txt"
+    run_client(str(input_file), str(output_file), path=socket_path)
+    assert output_file.read_text() == "".join(
+        str(height) + "\n" for height in TEST_HEIGHTS * 50)
+
+
+def test_simulate_returns_error_for_invalid_run():
+    """
+    Test an invalid run gets an ERROR line back.
+    """
+    service = EngineService()
+    response = asyncio.run(
+        service.simulate(TetrisEngine(tot_rows=None), b"Q0,X1\n"))
+    assert response.startswith(b"ERROR")
+    response = asyncio.run(
+        service.simulate(TetrisEngine(tot_rows=None), b"Q0,Q2\n"))
+    assert response == b"2\n"
+
+
+def test_run_client_missing_input_file(socket_path, tmp_path):
+    """
+    Test a missing input file fails at once, without truncating the
+    output file.
+    """
+    output_file = tmp_path / "output.txt"
+    output_file.write_text("previous\n")
+    with pytest.raises(IOError):
+        run_client(str(tmp_path / "missing.txt"), str(output_file),
+                   path=socket_path)
+    assert output_file.read_text() == "previous\n"
+
+
+def test_run_client_raises_sender_error(socket_path, tmp_path):
+    """
+    Test an error reading the input ends the responses and is raised
+    by the client instead of hanging.
+    """
+    input_file = tmp_path / "input.txt"
+    input_file.write_text("".join(TEST_LINES))
+
+    def broken_sendall(sock, data):
+        raise OSError("broken pipe")
+
+    output_file = tmp_path / "output.txt"
+    with mock.patch("socket.socket.sendall", broken_sendall):
+        with pytest.raises(OSError, match="broken pipe"):
+            run_client(str(input_file), str(output_file), path=socket_path)
@@ -1,3 +1,9 @@
+import pytest
+
+from tetris_engine import shapes
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine.parser import parse_codes
 from tetris_engine.shapes import Coordinate, IShape
 from tetris_engine.shapes import JShape
 from tetris_engine.shapes import LShape
@@ -5,6 +11,11 @@ from tetris_engine.shapes import QShape
 from tetris_engine.shapes import SShape
 from tetris_engine.shapes import TShape
 from tetris_engine.shapes import ZShape
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.shapes import compile_shape
+from tetris_engine.shapes import parse_mask
+from tetris_engine.shapes import register_rotations
+from tetris_engine.shapes import register_shape
 
 
 def test_qshape_get_coordinate():
@@ -107,3 +118,101 @@ def test_coordinate():
     coord = Coordinate(row, col)
     assert coord.row == row
     assert coord.col == col
+
+
+def test_compile_shape():
+    """
+    Test compile_shape builds the footprint table of a shape.
+    """
+    table = compile_shape(JShape.cells)
+    assert table.width == 2
+    assert table.height == 3
+    assert table.bottom == (2, 2)
+    assert table.top == (2, 0)
+    assert table.row_masks == (0b10, 0b10, 0b11)
+
+
+def test_builtin_shape_ids():
+    """
+    Test the built in shapes keep their shape ids.
+    """
+    assert [SHAPE_IDS[shape_type] for shape_type in "QZSTILJ"] == \
+        list(range(7))
+
+
+def test_parse_mask():
+    """
+    Test parse_mask returns the cells of the mask from its top left.
+    """
+    assert parse_mask("..# .## ..#") == ((0, 1), (1, 0), (1, 1), (2, 1))
+    with pytest.raises(TetrisEngineException):
+        parse_mask("#x#")
+    with pytest.raises(TetrisEngineException):
+        parse_mask("...")
+
+
+def test_parse_mask_rejects_disconnected_cells(registry):
+    """
+    Test masks with an empty column or row between cells, or cells
+    touching only by a corner, are rejected naming the mask.
+    """
+    for mask in ("#.#", "# . #", "#. .#", "##. ... .##"):
+        with pytest.raises(TetrisEngineException, match="Disconnected"):
+            parse_mask(mask)
+    with pytest.raises(TetrisEngineException, match="'#.#'"):
+        register_shape("Gap", "#.#")
+    assert "Gap" not in SHAPE_IDS
+    assert parse_mask("#.# ###") == ((0, 0), (0, 2), (1, 0), (1, 1),
+                                     (1, 2))
+
+
+def test_register_shape(registry):
+    """
+    Test a registered shape is placed by the engine and parsed from
+    the input.
+    """
+    shape_id, = register_shape("Px", """
+        ###
+        .#.
+        .#.
+    """)
+    assert parse_codes("Px3,Q0") == [(shape_id, 3), (SHAPE_IDS["Q"], 0)]
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    engine.initialize()
+    assert engine.place(shape_id, 3) == 2
+    assert engine.place(shape_id, 4) == 5
+    assert shapes.SHAPE_CLASSES[shape_id](3).get_coordinates(
+        Coordinate(2, 3))[-1] == Coordinate(0, 4)
+    with pytest.raises(TetrisEngineException):
+        register_shape("Px", "#")
+    with pytest.raises(TetrisEngineException):
+        register_shape("P1", "#")
+
+
+def test_register_rotations(registry):
+    """
+    Test only the distinct rotations of a shape are registered.
+    """
+    assert register_rotations("Q") == []
+    assert len(register_rotations("S")) == 1
+    rotation_ids = register_rotations("T")
+    assert rotation_ids == [SHAPE_IDS["Tr"], SHAPE_IDS["Trr"],
+                            SHAPE_IDS["Trrr"]]
+    assert shapes.SHAPE_TABLES[SHAPE_IDS["Trr"]].cells == \
+        parse_mask(".#. ###")
+    assert shapes.SHAPE_TABLES[SHAPE_IDS["Tr"]].cells == \
+        parse_mask(".# ## .#")
+
+
+def test_register_rotations_rejects_other_shapes(registry):
+    """
+    Test a shape registered under the name of a rotation is not taken
+    for the rotation.
+    """
+    n_shapes = len(shapes.SHAPE_CLASSES)
+    register_shape("Lr", "###")
+    with pytest.raises(TetrisEngineException, match="Lr"):
+        register_rotations("L")
+    assert len(shapes.SHAPE_CLASSES) == n_shapes + 1
+    register_shape("Zr", ".# ## #.")
+    assert register_rotations("Z") == [SHAPE_IDS["Zr"]]
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine.shapes import Coordinate
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.sparse import SparseTetrisEngine
+
+
+def place_or_error(engine, shape_id, col):
+    """Returns the landing row of a placement, or the error message."""
+    try:
+        return engine.place(shape_id, col)
+    except TetrisEngineException as ex:
+        return str(ex)
+
+
+def test_sparse_matches_dense_engine():
+    """
+    Test random placements give the same rows, errors, heights, stats
+    and snapshots on both engines.
+    """
+    rnd = random.Random(7)
+    for tot_rows, tot_cols in ((None, 4), (None, 10), (8, 13)):
+        dense = TetrisEngine(tot_rows, tot_cols)
+        sparse = SparseTetrisEngine(tot_rows, tot_cols)
+        dense.initialize()
+        sparse.initialize()
+        for _ in range(300):
+            shape_id = rnd.randrange(len(SHAPE_IDS))
+            col = rnd.randrange(-1, tot_cols)
+            assert place_or_error(dense, shape_id, col) == \
+                place_or_error(sparse, shape_id, col)
+            assert sparse.height == dense.height
+            assert sparse.snapshot() == dense.snapshot()
+        assert sparse.stats() == dense.stats()
+        for row in range(sparse.height):
+            for col in range(tot_cols):
+                coord = Coordinate(row, col)
+                assert sparse.get_state(coord) == dense.get_state(coord)
+
+
+def test_sparse_run_sequence_clears_rows():
+    """
+    Test run_sequence removes filled rows and returns the max height.
+    """
+    engine = SparseTetrisEngine(tot_rows=None, tot_cols=10)
+    engine.initialize()
+    codes = [(SHAPE_IDS["I"], 0), (SHAPE_IDS["I"], 4), (SHAPE_IDS["Q"], 8)]
+    assert engine.run_sequence(codes) == 1
+    assert engine.n_rows_cleared == 1
+    assert engine.count_cells() == 2
+
+
+def test_sparse_restore_dense_snapshot():
+    """
+    Test the sparse engine restores a snapshot of the dense engine and
+    removes rows like it.
+    """
+    dense = TetrisEngine(tot_rows=None, tot_cols=6)
+    dense.initialize()
+    dense.run_sequence([(SHAPE_IDS["Q"], 0), (SHAPE_IDS["T"], 2),
+                        (SHAPE_IDS["L"], 4)])
+    sparse = SparseTetrisEngine()
+    sparse.restore(dense.snapshot())
+    assert sparse.snapshot() == dense.snapshot()
+    dense.remove_row(0)
+    sparse.remove_row(0)
+    assert sparse.snapshot() == dense.snapshot()
+
+
+def test_sparse_restore_rejects_truncated_snapshot():
+    """
+    Test the sparse engine rejects a truncated snapshot.
+    """
+    engine = SparseTetrisEngine(tot_rows=None, tot_cols=6)
+    engine.initialize()
+    engine.run_sequence([(SHAPE_IDS["Q"], 0), (SHAPE_IDS["T"], 2)])
+    snapshot = engine.snapshot()
+    restored = SparseTetrisEngine()
+    with pytest.raises(TetrisEngineException):
+        restored.restore(snapshot[:-1])
+    restored.restore(snapshot)
+    assert restored.snapshot() == snapshot
+
+
+def test_sparse_memory_does_not_grow_with_width():
+    """
+    Test a wide grid only stores the columns with occupied cells.
+    """
+    engine = SparseTetrisEngine(tot_rows=None, tot_cols=100000)
+    engine.initialize()
+    engine.run_sequence([(SHAPE_IDS["Q"], 50000), (SHAPE_IDS["I"], 99996)])
+    assert engine.height == 2
+    assert sorted(engine._cells) == [50000, 50001, 99996, 99997, 99998,
+                                     99999]
+    assert engine.get_highest_unoccupied_row(0) == 0
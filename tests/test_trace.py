@@ -0,0 +1,181 @@
+import pytest
+
+from tetris_engine.cli import main
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine.shapes import SHAPE_CLASSES
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.shapes import register_shape
+from tetris_engine.sparse import SparseTetrisEngine
+from tetris_engine.trace import Divergence
+from tetris_engine.trace import RESET
+from tetris_engine.trace import TraceReader
+from tetris_engine.trace import first_divergence
+from tetris_engine.trace import format_step
+from tetris_engine.trace import record_trace
+from tetris_engine.trace import replay
+
+RUNS = (
+    [(SHAPE_IDS["I"], 0), (SHAPE_IDS["I"], 4), (SHAPE_IDS["Q"], 8)],
+    [(SHAPE_IDS["T"], 1), (SHAPE_IDS["Z"], 3), (SHAPE_IDS["I"], 4)],
+    [(SHAPE_IDS["Q"], 0), (SHAPE_IDS["I"], 2), (SHAPE_IDS["I"], 6),
+     (SHAPE_IDS["I"], 0), (SHAPE_IDS["I"], 6), (SHAPE_IDS["I"], 6),
+     (SHAPE_IDS["Q"], 2), (SHAPE_IDS["Q"], 4)],
+)
+
+
+def write_trace(file_path, runs, engine=None):
+    """Simulate runs on a traced engine and return their heights."""
+    engine = engine or TetrisEngine(tot_rows=None, tot_cols=10)
+    heights = []
+    with record_trace(engine, str(file_path)):
+        for run in runs:
+            engine.initialize()
+            heights.append(engine.run_sequence(run))
+    return heights
+
+
+def test_trace_records_steps(tmpdir):
+    """
+    Test a trace holds a step starting every run and one per placement,
+    with its landing row and filled rows.
+    """
+    trace_file = tmpdir.join("run.trc")
+    write_trace(trace_file, RUNS[:1])
+    with TraceReader(str(trace_file)) as reader:
+        assert (reader.rows, reader.cols) == (None, 10)
+        assert list(reader.iter_steps()) == [
+            (RESET, 0, 0, 0),
+            (SHAPE_IDS["I"], 0, 0, 0),
+            (SHAPE_IDS["I"], 4, 0, 0),
+            (SHAPE_IDS["Q"], 8, 1, 0b10),
+        ]
+    assert format_step((SHAPE_IDS["Q"], 8, 1, 0b10)) == \
+        "Q8 at row 1, removed rows 0"
+
+
+def test_trace_same_for_every_path(tmpdir):
+    """
+    Test placing one shape at a time and on the sparse engine records
+    the same trace as run_sequence.
+    """
+    write_trace(tmpdir.join("run.trc"), RUNS)
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    with record_trace(engine, str(tmpdir.join("place.trc"))):
+        for run in RUNS:
+            engine.initialize()
+            for shape_id, col in run:
+                engine.process_input(SHAPE_CLASSES[shape_id](col))
+    write_trace(tmpdir.join("sparse.trc"), RUNS,
+                SparseTetrisEngine(tot_rows=None, tot_cols=10))
+    expected = tmpdir.join("run.trc").read_binary()
+    assert tmpdir.join("place.trc").read_binary() == expected
+    assert tmpdir.join("sparse.trc").read_binary() == expected
+
+
+def test_trace_rejects_tall_shapes(tmpdir, registry):
+    """
+    Test registered shapes too tall for the mask of the filled rows are
+    rejected before the trace starts or the engine places a shape.
+    """
+    trace_file = tmpdir.join("run.trc")
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    with record_trace(engine, str(trace_file)):
+        engine.initialize()
+        engine.run_sequence([(SHAPE_IDS["I"], 0)])
+        snapshot = engine.snapshot()
+        shape_id, = register_shape("Tall", "\n".join(["#"] * 33))
+        with pytest.raises(TetrisEngineException, match="Tall"):
+            engine.run_sequence([(SHAPE_IDS["I"], 4)])
+        with pytest.raises(TetrisEngineException, match="Tall"):
+            engine.process_input(SHAPE_CLASSES[shape_id](0))
+        assert engine.snapshot() == snapshot
+    with pytest.raises(TetrisEngineException, match="Tall"):
+        with record_trace(engine, str(tmpdir.join("tall.trc"))):
+            pass
+    assert engine.trace is None
+    assert not tmpdir.join("tall.trc").check()
+
+
+def test_trace_flushes_long_runs(tmpdir, monkeypatch):
+    """
+    Test the buffered steps are written out within a run, on every path.
+    """
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    run = RUNS[2] * 4
+    with record_trace(engine, str(tmpdir.join("run.trc"))) as writer:
+        writer.flush_size = 8
+        engine.initialize()
+        engine.run_sequence(run)
+        assert len(writer.steps) <= writer.flush_size
+        engine.initialize()
+        for shape_id, col in run:
+            engine.process_input(SHAPE_CLASSES[shape_id](col))
+            assert len(writer.steps) <= writer.flush_size
+    assert [replay_engine.height for replay_engine in replay(
+        str(tmpdir.join("run.trc")))] == [engine.height] * 2
+
+
+def test_replay_rebuilds_boards(tmpdir):
+    """
+    Test replaying a trace gives the boards of the runs, without
+    looking for the landing rows.
+    """
+    trace_file = str(tmpdir.join("run.trc"))
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    heights = write_trace(trace_file, RUNS, engine)
+    replayed = []
+    for replay_engine in replay(trace_file):
+        replayed.append(replay_engine.height)
+    assert replayed == heights
+    assert replay_engine.snapshot() == engine.snapshot()
+    assert replay_engine.stats()["probe_iterations"] == 0
+    sparse = SparseTetrisEngine()
+    assert [sparse_engine.height for sparse_engine in replay(
+        trace_file, sparse)] == heights
+    assert sparse.snapshot() == engine.snapshot()
+    # The first run and the first shape of the second one.
+    assert [replay_engine.height for replay_engine in replay(
+        trace_file, stop=6)] == [1, 2]
+
+
+def test_first_divergence(tmpdir):
+    """
+    Test the first differing step of two traces is found.
+    """
+    expected_file = str(tmpdir.join("expected.trc"))
+    write_trace(expected_file, RUNS)
+    assert first_divergence(expected_file, expected_file) is None
+    actual_file = str(tmpdir.join("actual.trc"))
+    changed = list(RUNS[1])
+    changed[1] = (SHAPE_IDS["S"], 3)
+    write_trace(actual_file, [RUNS[0], changed, RUNS[2]])
+    assert first_divergence(expected_file, actual_file) == Divergence(
+        6, 1, 1, (SHAPE_IDS["Z"], 3, 2, 0), (SHAPE_IDS["S"], 3, 3, 0))
+    write_trace(actual_file, RUNS[:2])
+    assert first_divergence(expected_file, actual_file) == Divergence(
+        8, 2, None, (RESET, 0, 0, 0), None)
+    assert first_divergence(actual_file, expected_file) == Divergence(
+        8, 2, None, None, (RESET, 0, 0, 0))
+
+
+def test_main_trace(tmpdir, capsys):
+    """
+    Test --trace records a trace that replays to the same output and
+    matches itself.
+    """
+    input_file = tmpdir.join("input.txt")
+    input_file.write("I0,I4,Q8\nT1,Z3,I4\n")
+    output_file = tmpdir.join("output.txt")
+    trace_file = str(tmpdir.join("run.trc"))
+    main([str(input_file), str(output_file), "--trace", trace_file])
+    replay_file = tmpdir.join("replay.txt")
+    assert main(["trace", "replay", trace_file, str(replay_file)]) == 0
+    assert replay_file.read() == output_file.read() == "1\n4\n"
+    assert main(["trace", "verify", trace_file, trace_file]) == 0
+    assert "The traces match" in capsys.readouterr().out
+    other_file = str(tmpdir.join("other.trc"))
+    main([str(input_file), str(output_file), "--trace", other_file,
+          "--cols", "12"])
+    assert main(["trace", "verify", trace_file, other_file]) == 2
+    assert "different grids" in capsys.readouterr().err
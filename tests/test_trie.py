@@ -0,0 +1,95 @@
+import weakref
+
+import mock
+
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.parser import parse_codes
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.trie import SequenceTrie
+
+TEST_LINES = [
+    "L0,J3,L5,J8,T1",
+    "L0,J3,L5,J8,T1,T6",
+    "L0,J3,L5,J8,T1,T6,J2,L6,T0,T7",
+    "L0,J3,L5,J8,T1,T6,S2,Z5,T0,T7",
+    "Q0,I2,I6,I0,I6,I6,Q2,Q4",
+    "L0,J3,L5,J8,T1",
+]
+
+
+def simulate(codes):
+    engine = TetrisEngine(tot_rows=None)
+    engine.initialize()
+    for shape_id, col in codes:
+        engine.place(shape_id, col)
+    return engine.height
+
+
+def test_add_shares_prefixes():
+    """
+    Test the inputs shared by the start of several runs are only added
+    once.
+    """
+    trie = SequenceTrie()
+    for line in TEST_LINES:
+        trie.add(parse_codes(line))
+    assert trie.n_runs == len(TEST_LINES)
+    assert trie.n_inputs == 44
+    # 10 for the L0,J3,.. runs, 4 more for the S2,.. branch, 8 for Q0,..
+    assert trie.n_nodes == 22
+
+
+def test_evaluate_matches_independent_runs():
+    """
+    Test evaluate gives the height of each run, in order.
+    """
+    trie = SequenceTrie()
+    for line in TEST_LINES:
+        trie.add(parse_codes(line))
+    heights = trie.evaluate(TetrisEngine(tot_rows=None))
+    assert heights == [simulate(parse_codes(line)) for line in TEST_LINES]
+
+
+def test_evaluate_counts_every_input_once():
+    """
+    Test the counters of the engine cover the inputs of every branch.
+    """
+    trie = SequenceTrie()
+    trie.add([(SHAPE_IDS["Q"], 0), (SHAPE_IDS["I"], 2)])
+    trie.add([(SHAPE_IDS["Q"], 0), (SHAPE_IDS["T"], 3)])
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    trie.evaluate(engine)
+    assert engine.stats()["pieces_placed"] == trie.n_nodes == 3
+
+
+def test_evaluate_keeps_few_engines():
+    """
+    Test the engines of the runs that part are only copied when they
+    are simulated, not all at the node where they part.
+    """
+    trie = SequenceTrie()
+    for first_col in range(0, 10, 2):
+        for second_col in range(0, 10, 2):
+            trie.add([(SHAPE_IDS["Q"], first_col),
+                      (SHAPE_IDS["Q"], second_col)])
+    live_engines = weakref.WeakSet()
+    max_live = []
+    clone = TetrisEngine.clone
+
+    def tracked_clone(engine):
+        copy = clone(engine)
+        live_engines.add(copy)
+        max_live.append(len(live_engines))
+        return copy
+
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    with mock.patch.object(TetrisEngine, "clone", tracked_clone):
+        heights = trie.evaluate(engine)
+    assert heights == [4 if first_col == second_col else 2
+                       for first_col in range(0, 10, 2)
+                       for second_col in range(0, 10, 2)]
+    assert engine.stats()["pieces_placed"] == trie.n_nodes == 30
+    # The copies of the root and of one node below it, the engine of the
+    # run simulated last and its copy for the next one. All the runs
+    # parting from a node are not copied at once.
+    assert max(max_live) <= 4
@@ -0,0 +1,36 @@
+from benchmarks.workloads import WORKLOADS
+from benchmarks.workloads import clear_sequence
+from benchmarks.workloads import format_line
+from tetris_engine.engine import TetrisEngine
+
+
+def test_workloads_are_seeded():
+    """
+    Test the same seed gives the same sequence and the columns fit
+    in the grid.
+    """
+    for generator in WORKLOADS.values():
+        sequence = list(generator(1, 200, 12))
+        assert sequence == list(generator(1, 200, 12))
+        assert len(sequence) == 200
+        for shape_class, col in sequence:
+            assert 0 <= col <= 12 - shape_class.table.width
+
+
+def test_clear_sequence_fills_rows():
+    """
+    Test every layer of the clear workload removes two rows.
+    """
+    engine = TetrisEngine(tot_rows=None, tot_cols=10)
+    engine.initialize()
+    for shape_class, col in clear_sequence(0, 14, 10):
+        engine.process_input(shape_class(col))
+    # Two full layers of 5 Q shapes, and 4 more.
+    assert engine.height == 2
+
+
+def test_format_line():
+    """
+    Test format_line gives a line of the input file.
+    """
+    assert format_line(clear_sequence(0, 1, 2)) == "Q0"
@@ -0,0 +1,190 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from tetris_engine.engine import GRID_MAX_COLS
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.parser import parse_codes
+from tetris_engine.pool import ENGINE_POOL
+from tetris_engine.sequence_file import SequenceReader
+
+
+# Runs are sent to the workers in chunks of about this many inputs, so
+# that chunks cost about the same to simulate however long their runs
+# are. A run is never split, a run longer than this is a chunk of its
+# own.
+CHUNK_PIECES = 16 * 1024
+# Chunks in flight per worker, bounds the memory used ahead of the output.
+MAX_PENDING_PER_WORKER = 4
+
+
+def simulate_lines(lines, tot_rows=None, tot_cols=GRID_MAX_COLS,
+                   engine_class=TetrisEngine):
+    """
+    Simulate each line of input as an independent run.
+
+    Args:
+        lines (list(str)): Lines of input, one run per line.
+        tot_rows (int): Tot rows in the Grid.
+        tot_cols (int): Tot columns in the Grid.
+        engine_class (type): TetrisEngine or a subclass of it.
+
+    Returns:
+        list(int): The max height after each run.
+    """
+    heights = []
+    # Workers run many chunks, they reuse the engine of the last one.
+    with ENGINE_POOL.borrow(tot_rows, tot_cols, engine_class) as engine:
+        for line in lines:
+            engine.initialize()
+            heights.append(engine.run_sequence(parse_codes(line)))
+    return heights
+
+
+def chunk_lines(lines, chunk_pieces=CHUNK_PIECES):
+    """
+    Group lines into chunks of about chunk_pieces inputs.
+
+    Args:
+        lines (iterable(str)): Lines of input.
+        chunk_pieces (int): The number of inputs per chunk.
+
+    Yields:
+        list(str): The next chunk of lines.
+    """
+    chunk = []
+    pieces = 0
+    for line in lines:
+        chunk.append(line)
+        # Counted without parsing the line, the workers parse it.
+        pieces += line.count(",") + 1
+        if pieces >= chunk_pieces:
+            yield chunk
+            chunk = []
+            pieces = 0
+    if chunk:
+        yield chunk
+
+
+def simulate_sequence_file(file_path, start, stop, tot_rows=None,
+                           tot_cols=GRID_MAX_COLS, engine_class=TetrisEngine):
+    """
+    Simulate a range of the runs of a binary sequence file.
+
+    Args:
+        file_path (str): Path to the binary sequence file.
+        start (int): The index of the first run.
+        stop (int): The index after the last run.
+        tot_rows (int): Tot rows in the Grid.
+        tot_cols (int): Tot columns in the Grid.
+        engine_class (type): TetrisEngine or a subclass of it.
+
+    Returns:
+        list(int): The max height after each run.
+    """
+    heights = []
+    with SequenceReader(file_path) as reader, \
+            ENGINE_POOL.borrow(tot_rows, tot_cols, engine_class) as engine:
+        for run_idx in range(start, stop):
+            engine.initialize()
+            shape_ids, cols = reader.get_run(run_idx)
+            heights.append(engine.run_sequence(zip(shape_ids, cols)))
+            del shape_ids, cols
+    return heights
+
+
+def chunk_runs(reader, chunk_pieces=CHUNK_PIECES):
+    """
+    Group the runs of a binary sequence file into ranges of about
+    chunk_pieces inputs.
+
+    Args:
+        reader (SequenceReader): The opened binary sequence file.
+        chunk_pieces (int): The number of inputs per chunk.
+
+    Yields:
+        tuple(int, int): The index of the first run of the chunk and
+          the index after its last run.
+    """
+    chunk_size = chunk_pieces * (1 + reader.col_size)
+    start = 0
+    for run_idx in range(1, len(reader) + 1):
+        if reader.get_offset(run_idx) - reader.get_offset(start) >= \
+                chunk_size:
+            yield start, run_idx
+            start = run_idx
+    if start < len(reader):
+        yield start, len(reader)
+
+
+def run_parallel(lines, workers, tot_rows=None, tot_cols=GRID_MAX_COLS,
+                 chunk_pieces=CHUNK_PIECES, engine_class=TetrisEngine):
+    """
+    Simulate lines of input across a pool of processes.
+
+    Args:
+        lines (iterable(str)): Lines of input, one run per line.
+        workers (int): The number of worker processes.
+        tot_rows (int): Tot rows in the Grid.
+        tot_cols (int): Tot columns in the Grid.
+        chunk_pieces (int): The number of inputs per chunk.
+        engine_class (type): TetrisEngine or a subclass of it.
+
+    Yields:
+        int: The max height after each run, in input order.
+    """
+    tasks = ((simulate_lines, chunk, tot_rows, tot_cols, engine_class)
+             for chunk in chunk_lines(lines, chunk_pieces))
+    return _run_in_order(tasks, workers)
+
+
+def run_parallel_file(file_path, workers, tot_rows=None,
+                      tot_cols=GRID_MAX_COLS, chunk_pieces=CHUNK_PIECES,
+                      engine_class=TetrisEngine):
+    """
+    Simulate the runs of a binary sequence file across a pool of
+    processes. Workers map the file themselves and jump to their runs
+    through the run index, only run ranges are sent to them.
+
+    Args:
+        file_path (str): Path to the binary sequence file.
+        workers (int): The number of worker processes.
+        tot_rows (int): Tot rows in the Grid.
+        tot_cols (int): Tot columns in the Grid.
+        chunk_pieces (int): The number of inputs per chunk.
+        engine_class (type): TetrisEngine or a subclass of it.
+
+    Yields:
+        int: The max height after each run, in input order.
+    """
+    with SequenceReader(file_path) as reader:
+        ranges = list(chunk_runs(reader, chunk_pieces))
+    tasks = ((simulate_sequence_file, file_path, start, stop, tot_rows,
+              tot_cols, engine_class) for start, stop in ranges)
+    return _run_in_order(tasks, workers)
+
+
+def _run_in_order(tasks, workers):
+    """
+    Run tasks on a pool of processes, with a bounded number of them
+    in flight.
+
+    Args:
+        tasks (iterable(tuple)): The function and arguments of each task,
+          every task returns a list of heights.
+        workers (int): The number of worker processes.
+
+    Yields:
+        int: The heights returned by the tasks, in the order of the
+          tasks.
+    """
+    max_pending = workers * MAX_PENDING_PER_WORKER
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(*task))
+            if len(pending) >= max_pending:
+                for height in pending.popleft().result():
+                    yield height
+        while pending:
+            for height in pending.popleft().result():
+                yield height
@@ -0,0 +1,143 @@
+import hashlib
+import sqlite3
+from array import array
+from collections import OrderedDict
+from itertools import chain
+
+from tetris_engine.shapes import SHAPE_CLASSES
+from tetris_engine.shapes import SHAPE_TABLES
+
+# Max number of results kept in memory.
+DEFAULT_MAXSIZE = 100000
+
+# The registered shapes the last fingerprint was made of, and the
+# fingerprint.
+_fingerprint = (None, None)
+
+
+def shapes_fingerprint():
+    """
+    Returns a digest of the type and cells of every registered shape,
+    by shape id.
+
+    The shape ids of the codes are only stable for the built in shapes,
+    custom shapes registered in another order get other ids.
+
+    Returns:
+        bytes: The digest, the same while the registry is unchanged.
+    """
+    global _fingerprint
+    shapes = (tuple(SHAPE_CLASSES), tuple(SHAPE_TABLES))
+    if _fingerprint[0] != shapes:
+        digest = hashlib.blake2b(digest_size=16)
+        for shape_class, table in zip(*shapes):
+            digest.update("{}:{!r};".format(shape_class.shape_type,
+                                            table.cells).encode())
+        _fingerprint = (shapes, digest.digest())
+    return _fingerprint[1]
+
+
+def make_key(codes, tot_rows, tot_cols):
+    """
+    Returns the cache key of a run.
+
+    Args:
+        codes (list(tuple(int, int))): The (shape id, col) codes of the
+          inputs of the run.
+        tot_rows (int): Tot rows in the Grid, None for no limit.
+        tot_cols (int): Tot columns in the Grid.
+
+    Returns:
+        bytes: A digest of the grid size, the registered shapes and the
+          inputs.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("{}x{}:".format(tot_rows, tot_cols).encode())
+    digest.update(shapes_fingerprint())
+    digest.update(array("q", chain.from_iterable(codes)).tobytes())
+    return digest.digest()
+
+
+class ResultCache(object):
+    """
+    Caches the max height of runs, in memory up to maxsize results
+    (least recently used first out) and optionally on disk.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, path=None):
+        """
+        Args:
+            maxsize (int): Max number of results kept in memory.
+            path (str): Path to a sqlite file to keep the results
+              across runs in, None to keep them in memory only.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results "
+                "(key BLOB PRIMARY KEY, height INTEGER)")
+
+    def get(self, key):
+        """
+        Look up the result of a run.
+
+        Args:
+            key (bytes): The key of the run (see make_key).
+
+        Returns:
+            int: The max height of the run, None if not cached.
+        """
+        height = self._results.get(key)
+        if height is not None:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return height
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT height FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, row[0])
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, key, height):
+        """
+        Cache the result of a run.
+
+        Args:
+            key (bytes): The key of the run (see make_key).
+            height (int): The max height of the run.
+        """
+        self._remember(key, height)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?)", (key, height))
+
+    def _remember(self, key, height):
+        self._results[key] = height
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def close(self):
+        """
+        Write the results to disk.
+        """
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
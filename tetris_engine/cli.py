@@ -0,0 +1,322 @@
+"""
+The tetris_engine command.
+
+Only the modules needed by the options given are imported, so that
+small jobs do not pay for the start up of the ones they do not use.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from contextlib import ExitStack
+
+import tetris_engine
+from tetris_engine.engine import GRID_MAX_COLS
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.log import HANDLER
+from tetris_engine.log import get_logger
+from tetris_engine.log import set_log_level
+from tetris_engine.metrics import add_metrics_arguments
+from tetris_engine.pool import ENGINE_POOL
+from tetris_engine.shapes import SHAPE_CLASSES
+
+
+logger = get_logger("app")
+
+# Bytes of output buffered between writes to the output file.
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+
+def main(argv=None):
+    """
+    Entry point of the tetris_engine command.
+
+    Args:
+        argv (list(str)): The arguments, defaults to sys.argv[1:].
+    """
+    try:
+        return _main(argv)
+    finally:
+        # The records logged by the command are written out before it
+        # returns, not when the process exits.
+        HANDLER.flush()
+
+
+def _main(argv):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["serve"]:
+        from tetris_engine.service import main_serve
+        return main_serve(argv[1:])
+    if argv[:1] == ["client"]:
+        from tetris_engine.service import main_client
+        return main_client(argv[1:])
+    if argv[:1] == ["trace"]:
+        from tetris_engine.trace import main as main_trace
+        return main_trace(argv[1:])
+    parser = argparse.ArgumentParser(description="A Simple Tetris Engine.")
+    parser.add_argument("input_file", nargs=1, help="Path to input file")
+    parser.add_argument("output_file", nargs='?',
+                        help="Path to output file", default="output.txt",
+                        )
+    parser.add_argument("--cols", type=int, default=GRID_MAX_COLS,
+                        help="Number of columns in the grid")
+    parser.add_argument("--sparse", action="store_true",
+                        help="Store only the occupied cells, faster for "
+                        "grids of 10000 columns or more")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of processes to simulate with")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse the results of repeated lines")
+    parser.add_argument("--cache-file",
+                        help="Keep the cached results in this file "
+                        "across invocations, implies --cache")
+    parser.add_argument("--trie", action="store_true",
+                        help="Simulate the inputs shared by the start of "
+                        "several lines once, reads the whole input first")
+    parser.add_argument("--stats", action="store_true",
+                        help="Report the time of each phase, pieces/sec, "
+                        "the latency of the runs and the slowest ones")
+    parser.add_argument("--trace", metavar="TRACE_FILE",
+                        help="Record every placement to this binary trace "
+                        "file, see 'tetris_engine trace --help'")
+    parser.add_argument("--profile", metavar="PROFILE_FILE",
+                        help="Write a profile of the run to this file")
+    parser.add_argument("--profile-format", default="pstats",
+                        choices=("pstats", "collapsed"),
+                        help="A cProfile dump, or sampled stacks for "
+                        "flamegraph tools")
+    add_metrics_arguments(parser)
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="Log progress, twice to log every input")
+
+    args = parser.parse_args(argv)
+    if args.profile:
+        from tetris_engine.profiling import profile_to
+        with profile_to(args.profile, args.profile_format):
+            run_command(args)
+        logger.info("Wrote profile - {}".format(args.profile))
+    else:
+        run_command(args)
+
+
+def run_command(args):
+    """
+    Simulate the input file given on the command line.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+    """
+    if args.verbose:
+        set_log_level(logging.DEBUG if args.verbose > 1 else logging.INFO)
+    logger.info("Welcome to Simple Tetris Engine - {}".format(tetris_engine.__version__))
+    input_file = args.input_file[0]
+    output_file = args.output_file
+    logger.info("Input File: {}".format(input_file))
+    logger.info("Output File: {}".format(output_file))
+    if not os.path.exists(input_file):
+        raise IOError("{} file does not exist".format(input_file))
+
+    if args.stats and (args.workers > 1 or args.trie):
+        logger.warning("--stats is not used with --workers or --trie")
+    exports_metrics = args.metrics_file or args.metrics_port is not None
+    if exports_metrics and args.workers > 1:
+        logger.warning("The engine counters are not exported with --workers")
+    # Runs answered from the cache or shared in the trie would be
+    # missing from the trace.
+    traces = args.trace and not (args.workers > 1 or args.trie
+                                 or args.cache or args.cache_file)
+    if args.trace and not traces:
+        logger.warning("--trace is not used with --workers, --trie or "
+                       "--cache")
+    engine_class = TetrisEngine
+    if args.sparse:
+        from tetris_engine.sparse import SparseTetrisEngine
+        engine_class = SparseTetrisEngine
+    if args.workers > 1:
+        from tetris_engine.batch import run_parallel
+        from tetris_engine.batch import run_parallel_file
+        from tetris_engine.sequence_file import is_sequence_file
+        if args.cache or args.cache_file:
+            logger.warning("The cache is not used with --workers")
+        # Every line is an independent run, spread them across processes.
+        if is_sequence_file(input_file):
+            heights = run_parallel_file(input_file, args.workers,
+                                        tot_cols=args.cols,
+                                        engine_class=engine_class)
+        else:
+            heights = run_parallel(read_lines(input_file), args.workers,
+                                   tot_cols=args.cols,
+                                   engine_class=engine_class)
+        write_ouput(output_file, (str(height) + "\n" for height in heights))
+        return
+    # Process Input file, one line at a time.
+    all_inputs = read_input(input_file)
+    with ExitStack() as stack:
+        engine = stack.enter_context(ENGINE_POOL.borrow(
+            tot_rows=None, tot_cols=args.cols, engine_class=engine_class))
+        if exports_metrics:
+            from tetris_engine.metrics import MetricsExporter
+            stack.enter_context(MetricsExporter(
+                engine.stats, args.metrics_file, args.metrics_port))
+        if traces:
+            from tetris_engine.trace import record_trace
+            stack.enter_context(record_trace(engine, args.trace))
+        simulate_file(engine, all_inputs, output_file, args)
+
+
+def simulate_file(engine, all_inputs, output_file, args):
+    """
+    Simulate the runs of the input file one at a time and write their
+    max heights.
+
+    Args:
+        engine (TetrisEngine): The engine to simulate on.
+        all_inputs (iterable(iterable(tuple(int, int)))): The runs of
+          inputs, as (shape id, col) codes.
+        output_file (str): Path to the output file.
+        args (argparse.Namespace): The parsed arguments.
+    """
+    if args.trie:
+        from tetris_engine.trie import SequenceTrie
+        trie = SequenceTrie()
+        for run in all_inputs:
+            trie.add(run)
+        logger.info("Simulating {} of {} inputs".format(
+            trie.n_nodes, trie.n_inputs))
+        heights = trie.evaluate(engine)
+        write_ouput(output_file, (str(height) + "\n" for height in heights))
+        return
+    stats = None
+    if args.stats:
+        from tetris_engine.profiling import RunStats
+        stats = RunStats()
+        all_inputs = stats.timed(all_inputs, "parse")
+    if not (args.cache or args.cache_file):
+        write_ouput(output_file, simulate(engine, all_inputs, stats=stats),
+                    stats)
+    else:
+        from tetris_engine.cache import ResultCache
+        with ResultCache(path=args.cache_file) as cache:
+            write_ouput(output_file,
+                        simulate(engine, all_inputs, cache, stats), stats)
+        sys.stderr.write(
+            "Cache - hits: {} (from disk: {}), misses: {}\n".format(
+                cache.hits, cache.disk_hits, cache.misses))
+    if stats is not None:
+        sys.stderr.write(stats.report())
+
+
+def simulate(engine, all_inputs, cache=None, stats=None):
+    """
+    Simulate each run of inputs on the engine.
+
+    Args:
+        engine (TetrisEngine): The engine to simulate on.
+        all_inputs (iterable(list(tuple(int, int)))): The runs of inputs,
+          as (shape id, col) codes.
+        cache (ResultCache): The results of the runs seen before, None
+          to simulate every run.
+        stats (RunStats): Times every run simulated, if given.
+
+    Yields:
+        str: The max height after each run, as a line of output.
+    """
+    if cache is not None:
+        from tetris_engine.cache import make_key
+    for run in all_inputs:
+        if cache is not None:
+            run = list(run)
+            key = make_key(run, engine.rows, engine.cols)
+            height = cache.get(key)
+            if height is not None:
+                if stats is not None:
+                    stats.skip_run()
+                yield str(height) + "\n"
+                continue
+        engine.initialize()
+        if stats is not None:
+            run = list(run)
+            rows_cleared = engine.n_rows_cleared
+            start = time.perf_counter()
+        if logger.isEnabledFor(logging.DEBUG):
+            for shape_id, col in run:
+                row = engine.place(shape_id, col)
+                logger.debug("Placed %s%s at row %s",
+                             SHAPE_CLASSES[shape_id].shape_type, col, row)
+        else:
+            engine.run_sequence(run)
+        if stats is not None:
+            # With -vv the time includes the logging of every input.
+            stats.add_run(time.perf_counter() - start, run,
+                          engine.n_rows_cleared - rows_cleared)
+        logger.debug("Max Height - %s", engine.height)
+        if cache is not None:
+            cache.put(key, engine.height)
+        yield str(engine.height) + "\n"
+
+
+def write_ouput(file_path, data, stats=None):
+    """
+    Write data to given file as it is produced.
+
+    Args:
+        file_path (str): Path to the output file.
+        data iterable(str): The lines to write.
+        stats (RunStats): Times the writes, if given.
+
+    """
+    # Written out in large blocks, a write per line would cost a system
+    # call per run on large outputs.
+    with open(file_path, 'w', buffering=OUTPUT_BUFFER_SIZE) as fp:
+        if stats is None:
+            for line in data:
+                fp.write(line)
+        else:
+            for line in data:
+                start = time.perf_counter()
+                fp.write(line)
+                stats.add_phase("write", time.perf_counter() - start)
+    logger.info("Wrote - {}".format(file_path))
+
+
+def read_lines(file_path):
+    """
+    Read the raw lines of the input file.
+
+    Args:
+        file_path (str): Path to the input file.
+
+    Yields:
+        str: A line of input, one line at a time.
+
+    """
+    with open(file_path, "r") as fp:
+        for line in fp:
+            yield line
+
+
+def read_input(file_path):
+    """
+    Read the input file.
+
+    Args:
+        file_path (str): Path to the input file.
+
+    Yields:
+        iterable(tuple(int, int)): The (shape id, col) codes of the
+          inputs of a line, one line at a time.
+
+    """
+    from tetris_engine.parser import iter_codes
+    from tetris_engine.sequence_file import SequenceReader
+    from tetris_engine.sequence_file import is_sequence_file
+    if is_sequence_file(file_path):
+        with SequenceReader(file_path) as reader:
+            for run in reader.iter_runs():
+                yield run
+        return
+    with open(file_path, "r") as fp:
+        for codes in iter_codes(fp):
+            yield codes
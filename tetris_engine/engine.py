@@ -1,9 +1,14 @@
 
+import struct
+import sys
+from array import array
 from enum import Enum
 
 from tetris_engine.exceptions import TetrisEngineException
 from tetris_engine.log import get_logger
 from tetris_engine.shapes import Coordinate
+from tetris_engine.shapes import SHAPE_CLASSES
+from tetris_engine.shapes import SHAPE_TABLES
 
 
 logger = get_logger(__name__)
@@ -22,6 +27,49 @@ GRID_MAX_ROWS = 10
 GRID_MAX_COLS = 10
 HEIGHT_INIT = -1
 
+SNAPSHOT_MAGIC = b"TESN"
+SNAPSHOT_VERSION = 1
+# magic, version, tot rows (HEIGHT_INIT for no limit), tot cols, height
+# and number of rows of the grid. Followed by the skyline (8 bytes per
+# column) and the rows of the grid ((tot cols + 7) // 8 bytes each).
+SNAPSHOT_HEADER = struct.Struct("<4sBxxxqQqQ")
+
+
+def unpack_snapshot(snapshot):
+    """
+    Unpack and check a snapshot returned by TetrisEngine.snapshot.
+
+    Args:
+        snapshot (bytes): The snapshot.
+
+    Returns:
+        tuple(int, int, int, int, array): Tot rows (None for no limit),
+          tot cols, height, number of rows of the grid and skyline.
+    """
+    if len(snapshot) < SNAPSHOT_HEADER.size:
+        raise TetrisEngineException("Invalid snapshot")
+    magic, version, rows, cols, height, n_rows = \
+        SNAPSHOT_HEADER.unpack_from(snapshot)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise TetrisEngineException("Invalid snapshot")
+    # A truncated snapshot, e.g written partially, has to be rejected
+    # rather than restored as another board.
+    if len(snapshot) != (SNAPSHOT_HEADER.size + 8 * cols
+                         + n_rows * ((cols + 7) // 8)):
+        raise TetrisEngineException("Invalid snapshot")
+    max_row = None if rows == HEIGHT_INIT else rows
+    if max_row is not None and (max_row < 0 or n_rows > max_row):
+        raise TetrisEngineException("Invalid snapshot")
+    skyline = array("q")
+    skyline.frombytes(snapshot[SNAPSHOT_HEADER.size:
+                               SNAPSHOT_HEADER.size + 8 * cols])
+    if sys.byteorder != "little":
+        skyline.byteswap()
+    for top in [height] + ([min(skyline), max(skyline)] if cols else []):
+        if top < HEIGHT_INIT or (max_row is not None and top >= max_row):
+            raise TetrisEngineException("Invalid snapshot")
+    return max_row, cols, height, n_rows, skyline
+
 
 class TetrisEngine(object):
     """
@@ -32,30 +80,197 @@ class TetrisEngine(object):
     def __init__(self, tot_rows=GRID_MAX_ROWS, tot_cols=GRID_MAX_COLS):
         """
         Args:
-            tot_rows (int): Tot rows in the Grid.
+            tot_rows (int): Tot rows in the Grid, None for a grid
+              without a height limit.
             tot_cols (int): Tot columns in the Grid.
         """
         self.rows = tot_rows
         self.cols = tot_cols
-        self.__height = HEIGHT_INIT  # The current max height
+        self._height = HEIGHT_INIT  # The current max height
+        # Each row is stored as an int bitmask, bit `col` set when the
+        # cell is OCCUPIED. Rows are only allocated up to the height of
+        # the stack and are dropped as soon as they are cleared.
         self._grid = []
+        # The top most non free (OCCUPIED or BLOCKED) row per column,
+        # every cell at or below it cannot be used by a shape.
+        self._skyline = []
+        self._full_row = (1 << tot_cols) - 1
+        # The range of columns whose skyline was raised since the last
+        # reset, empty when low is above high.
+        self._dirty_low = tot_cols
+        self._dirty_high = HEIGHT_INIT
+        # Counters kept across initialize, see stats.
+        self.n_pieces = 0
+        self.n_rows_cleared = 0
+        self.n_probes = 0
+        self.n_overflows = 0
+        self._peak_height = HEIGHT_INIT
+        # Records every run and placement when set, see
+        # tetris_engine.trace.
+        self.trace = None
 
     def initialize(self):
         """
         Reset/Initialize the Engine.
         """
-        logger.info("Initializing Engine...")
+        logger.debug("Initializing Engine...")
+        if self.trace is not None:
+            self.trace.add_reset()
+        self._height = HEIGHT_INIT
         self._grid = []
-        self.__height = HEIGHT_INIT
-        for _row in range(self.rows):
-            cols = [State.UNOCCUPIED for col in range(self.cols)]
-            self._grid.append(cols)
+        skyline = self._skyline
+        if len(skyline) != self.cols:
+            self._full_row = (1 << self.cols) - 1
+            self._skyline = [HEIGHT_INIT] * self.cols
+        elif self._dirty_low <= self._dirty_high:
+            # Only the columns the last run reached need a reset.
+            skyline[self._dirty_low:self._dirty_high + 1] = \
+                [HEIGHT_INIT] * (self._dirty_high + 1 - self._dirty_low)
+        self._dirty_low = self.cols
+        self._dirty_high = HEIGHT_INIT
+
+    def get_state(self, coord):
+        """
+        Returns the State of a cell in the grid.
+
+        Args:
+            coord (Coordinate): The cell to look up.
+
+        Returns:
+            State: The state of the cell.
+        """
+        if (coord.row < len(self._grid)
+                and self._grid[coord.row] & (1 << coord.col)):
+            return State.OCCUPIED
+        if coord.row <= self._skyline[coord.col]:
+            return State.BLOCKED
+        return State.UNOCCUPIED
+
+    def clone(self):
+        """
+        Returns a copy of the Engine that can be played independently.
+
+        Rows are immutable ints, so the copy only copies the row and
+        column lists, never the rows themselves. The counters of the
+        copy start from zero, see add_counters, and it is not traced.
+
+        Returns:
+            TetrisEngine: The copy.
+        """
+        engine = self.__class__.__new__(self.__class__)
+        engine.__dict__.update(self.__dict__)
+        engine._grid = list(self._grid)
+        engine._skyline = list(self._skyline)
+        engine.n_pieces = 0
+        engine.n_rows_cleared = 0
+        engine.n_probes = 0
+        engine.n_overflows = 0
+        engine.trace = None
+        return engine
+
+    def add_counters(self, other):
+        """
+        Add the counters of another Engine, e.g a clone, to this one.
+
+        Args:
+            other (TetrisEngine): The other Engine.
+        """
+        self.n_pieces += other.n_pieces
+        self.n_rows_cleared += other.n_rows_cleared
+        self.n_probes += other.n_probes
+        self.n_overflows += other.n_overflows
+        if self._peak_height < other._peak_height:
+            self._peak_height = other._peak_height
+
+    def board_key(self):
+        """
+        Returns a hashable key of the board, equal for two engines only
+        when the same shapes would land at the same rows on both.
+
+        Returns:
+            tuple: The key.
+        """
+        return tuple(self._grid), tuple(self._skyline)
+
+    def count_cells(self):
+        """
+        Returns the number of occupied cells in the grid.
+        """
+        return sum(bin(mask).count("1") for mask in self._grid)
+
+    def column_heights(self):
+        """
+        Returns the height of every column, one above its top most
+        non free (OCCUPIED or BLOCKED) row.
+
+        Returns:
+            list(int): The heights, from the left most column.
+        """
+        return [top + 1 for top in self._skyline]
+
+    def snapshot(self):
+        """
+        Returns the state of the Engine in a compact binary form.
+
+        Returns:
+            bytes: The snapshot, see restore.
+        """
+        row_bytes = (self.cols + 7) // 8
+        rows = HEIGHT_INIT if self.rows is None else self.rows
+        skyline = array("q", self._skyline)
+        if sys.byteorder != "little":
+            skyline.byteswap()
+        return b"".join([
+            SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, rows,
+                                 self.cols, self._height, len(self._grid)),
+            skyline.tobytes(),
+        ] + [mask.to_bytes(row_bytes, "little") for mask in self._grid])
+
+    def restore(self, snapshot):
+        """
+        Restore the state of the Engine from a snapshot.
+
+        Args:
+            snapshot (bytes): A snapshot returned by snapshot.
+        """
+        rows, cols, height, n_rows, skyline = unpack_snapshot(snapshot)
+        self.rows = rows
+        self.cols = cols
+        self._height = height
+        self._full_row = (1 << cols) - 1
+        self._skyline = skyline.tolist()
+        self._dirty_low = 0
+        self._dirty_high = cols - 1
+        offset = SNAPSHOT_HEADER.size + 8 * cols
+        row_bytes = (cols + 7) // 8
+        self._grid = [
+            int.from_bytes(snapshot[start:start + row_bytes], "little")
+            for start in range(offset, offset + n_rows * row_bytes,
+                               row_bytes)]
+
+    def stats(self):
+        """
+        Returns the counters of the Engine since it was created, they
+        are not reset by initialize.
+
+        Returns:
+            dict: The number of pieces placed, rows cleared, landing
+              loop iterations and placements rejected, and the highest
+              max height reached.
+        """
+        return {
+            "pieces_placed": self.n_pieces,
+            "rows_cleared": self.n_rows_cleared,
+            "probe_iterations": self.n_probes,
+            "overflow_errors": self.n_overflows,
+            "peak_height": self._peak_height + 1,
+        }
 
     @property
     def height(self):
         """Return the current max height of the grid"""
         # we start row with index 0 hence one extra
-        return self.__height + 1
+        return self._height + 1
 
     def get_highest_unoccupied_row(self, col):
         """
@@ -68,9 +283,9 @@ class TetrisEngine(object):
         Returns:
             int: The highest unoccupied row for given column.
         """
-        for row in range(self.rows):
-            coord = Coordinate(row, col)
-            if self.is_unoccupied([coord]):
+        if 0 <= col < self.cols:
+            row = self._skyline[col] + 1
+            if self.rows is None or row < self.rows:
                 return row
         raise TetrisEngineException(
             "Cannot find highest onoccupied row for col {}".format(col))
@@ -87,30 +302,295 @@ class TetrisEngine(object):
               is placed.
         """
         start_col = input_shape.left_col
-        start_row = self.get_highest_unoccupied_row(start_col)
-        coords_to_occupy = input_shape.get_coordinates(
-            Coordinate(start_row, start_col))
-        can_occupy = self.is_unoccupied(coords_to_occupy)
-        row = start_row
-        while not can_occupy and row < GRID_MAX_ROWS:
-            row += 1
-            coords_to_occupy = input_shape.get_coordinates(
-                Coordinate(row, start_col))
-            can_occupy = self.is_unoccupied(coords_to_occupy)
-        if row == GRID_MAX_ROWS:
+        row = self._place(input_shape.table, start_col)
+        if row is None:
             raise TetrisEngineException(
                 "{} - Input cannot be placed".format(input_shape))
-        # We have found the row where it can be placed, so now mark the
-        # coords occupied. Also mark all coordinates underneath the shape
-        # as blocked if not already occupied.
-        self.mark_coords_occupied_by_shape(coords_to_occupy)
-        # print(self._grid)
         input_shape_coord = Coordinate(row, start_col)
-        logger.info("Placed {} at {}".format(input_shape, input_shape_coord))
-        self.update_height(input_shape_coord)
-        self.check_and_remove_filled_rows()
+        logger.debug("Placed %s at %s", input_shape, input_shape_coord)
         return input_shape_coord
 
+    def place(self, shape_id, col):
+        """
+        Place a shape given by its code, without an InShape.
+
+        Args:
+            shape_id (int): The id of the shape (see SHAPE_IDS).
+            col (int): The left most column of the shape.
+
+        Returns:
+            int: The row at which the top of the shape is placed.
+        """
+        row = self._place(SHAPE_TABLES[shape_id], col)
+        if row is None:
+            raise TetrisEngineException("{}{} - Input cannot be placed".format(
+                SHAPE_CLASSES[shape_id].shape_type, col))
+        return row
+
+    def run_sequence(self, codes, landing_rows=None, heights=None):
+        """
+        Place a sequence of shapes given by their codes.
+
+        Does the same as calling place for each code, inlined in a
+        single loop and without logging, for callers that only need
+        the heights.
+
+        Args:
+            codes (iterable(tuple(int, int))): The (shape id, col) codes
+              of the shapes, in order.
+            landing_rows (list): If given, the row at which the top of
+              each shape is placed is appended to it.
+            heights (list): If given, the max height after each shape
+              is appended to it.
+
+        Returns:
+            int: The max height of the grid after the last shape.
+        """
+        tables = SHAPE_TABLES
+        grid = self._grid
+        skyline = self._skyline
+        tot_rows = self.rows
+        tot_cols = self.cols
+        full_row = self._full_row
+        height = self._height
+        dirty_low = self._dirty_low
+        dirty_high = self._dirty_high
+        peak_height = self._peak_height
+        n_pieces = 0
+        n_probes = 0
+        n_rows_cleared = 0
+        # Records the (shape id, col, row, filled rows) steps of a traced
+        # engine.
+        trace = self.trace
+        add_step = None
+        if trace is not None:
+            trace.check_shapes()
+            trace_steps = trace.steps
+            add_step = trace_steps.extend
+            flush_size = trace.flush_size
+        try:
+            for shape_id, col in codes:
+                table = tables[shape_id]
+                high_col = col + table.width - 1
+                if col < 0 or high_col >= tot_cols:
+                    row = None
+                else:
+                    # Same landing as _get_landing_row.
+                    row = HEIGHT_INIT
+                    d_col = col
+                    for d_row in table.bottom:
+                        landing = skyline[d_col] + 1 + d_row
+                        if landing > row:
+                            row = landing
+                        d_col += 1
+                if row is None or (tot_rows is not None and row >= tot_rows):
+                    self.n_overflows += 1
+                    raise TetrisEngineException(
+                        "{}{} - Input cannot be placed".format(
+                            SHAPE_CLASSES[shape_id].shape_type, col))
+                # Same marking as _mark_shape_occupied.
+                if len(grid) <= row:
+                    grid.extend([0] * (row + 1 - len(grid)))
+                d_row = row
+                for mask in table.row_masks:
+                    grid[d_row] |= mask << col
+                    d_row -= 1
+                d_col = col
+                for d_row in table.top:
+                    skyline[d_col] = row - d_row
+                    d_col += 1
+                if col < dirty_low:
+                    dirty_low = col
+                if high_col > dirty_high:
+                    dirty_high = high_col
+                n_pieces += 1
+                n_probes += table.width
+                if height < row:
+                    height = row
+                    if peak_height < row:
+                        peak_height = row
+                # Same removal as check_and_remove_filled_rows, on the
+                # rows of the shape only.
+                low_row = row - table.height + 1
+                removed = 0
+                filled = 0
+                for d_row in range(low_row, row + 1):
+                    if grid[d_row] == full_row:
+                        removed += 1
+                        filled |= 1 << (row - d_row)
+                if add_step is not None:
+                    if len(trace_steps) >= flush_size:
+                        trace.flush()
+                    add_step((shape_id, col, row, filled))
+                if removed:
+                    grid[low_row:row + 1] = [
+                        mask for mask in grid[low_row:row + 1]
+                        if mask != full_row]
+                    skyline[:] = [top - removed for top in skyline]
+                    height -= removed
+                    n_rows_cleared += removed
+                if landing_rows is not None:
+                    landing_rows.append(row)
+                if heights is not None:
+                    heights.append(height + 1)
+        finally:
+            self._height = height
+            self._dirty_low = dirty_low
+            self._dirty_high = dirty_high
+            self._peak_height = peak_height
+            self.n_pieces += n_pieces
+            self.n_probes += n_probes
+            self.n_rows_cleared += n_rows_cleared
+        return height + 1
+
+    def replay_sequence(self, steps):
+        """
+        Place shapes at known rows and remove the rows they filled, as
+        recorded in a trace, without looking for the landing rows.
+
+        Args:
+            steps (iterable(tuple(int, int, int, int))): The shape id,
+              left col, landing row and mask of the filled rows of each
+              shape, bit i set when the row i rows below its top was
+              filled.
+
+        Returns:
+            int: The max height of the grid after the last shape.
+        """
+        tables = SHAPE_TABLES
+        grid = self._grid
+        skyline = self._skyline
+        height = self._height
+        dirty_low = self._dirty_low
+        dirty_high = self._dirty_high
+        peak_height = self._peak_height
+        n_pieces = 0
+        n_rows_cleared = 0
+        try:
+            for shape_id, col, row, filled in steps:
+                table = tables[shape_id]
+                # Same marking as _mark_shape_occupied.
+                if len(grid) <= row:
+                    grid.extend([0] * (row + 1 - len(grid)))
+                d_row = row
+                for mask in table.row_masks:
+                    grid[d_row] |= mask << col
+                    d_row -= 1
+                d_col = col
+                for d_row in table.top:
+                    skyline[d_col] = row - d_row
+                    d_col += 1
+                if col < dirty_low:
+                    dirty_low = col
+                if col + table.width - 1 > dirty_high:
+                    dirty_high = col + table.width - 1
+                n_pieces += 1
+                if height < row:
+                    height = row
+                    if peak_height < row:
+                        peak_height = row
+                if filled:
+                    removed = 0
+                    # From the lowest row, the higher ones move down.
+                    while filled:
+                        bit = filled.bit_length() - 1
+                        del grid[row - bit - removed]
+                        filled ^= 1 << bit
+                        removed += 1
+                    skyline[:] = [top - removed for top in skyline]
+                    height -= removed
+                    n_rows_cleared += removed
+        finally:
+            self._height = height
+            self._dirty_low = dirty_low
+            self._dirty_high = dirty_high
+            self._peak_height = peak_height
+            self.n_pieces += n_pieces
+            self.n_rows_cleared += n_rows_cleared
+        return height + 1
+
+    def _place(self, table, col):
+        """
+        Drop a shape on the grid and remove the rows it fills.
+
+        Args:
+            table (ShapeTable): The compiled footprint of the shape.
+            col (int): The left most column of the shape.
+
+        Returns:
+            int: The row at which the top of the shape is placed, None
+              if the shape cannot be placed.
+        """
+        row = self._get_landing_row(table, col)
+        if row is None or (self.rows is not None and row >= self.rows):
+            self.n_overflows += 1
+            return None
+        if self.trace is not None:
+            self.trace.check_table(table)
+        # We have found the row where it can be placed, so now mark the
+        # shape occupied. Everything underneath it is now blocked.
+        self._mark_shape_occupied(table, row, col)
+        self.n_pieces += 1
+        self.n_probes += table.width
+        if self._height < row:
+            self._height = row
+            if self._peak_height < row:
+                self._peak_height = row
+        # Only the rows the shape was placed on can have been filled.
+        filled_rows = self.check_and_remove_filled_rows(
+            row - table.height + 1, row)
+        if self.trace is not None:
+            self.trace.add_step(table, col, row, filled_rows)
+        return row
+
+    def _get_landing_row(self, table, col):
+        """
+        Returns the row at which a shape dropped at the given column
+        comes to rest on the skyline.
+
+        Args:
+            table (ShapeTable): The compiled footprint of the shape.
+            col (int): The left most column of the shape.
+
+        Returns:
+            int: The row of the top of the shape, None if the shape does
+              not fit in the columns of the grid.
+        """
+        if col < 0 or col + table.width > self.cols:
+            return None
+        skyline = self._skyline
+        row = HEIGHT_INIT
+        # The lowest cell of the shape in each column has to rest above
+        # the skyline of that column.
+        for d_col, d_row in enumerate(table.bottom):
+            landing = skyline[col + d_col] + 1 + d_row
+            if landing > row:
+                row = landing
+        return row
+
+    def _mark_shape_occupied(self, table, row, col):
+        """
+        Mark the cells of a shape occupied in the grid.
+
+        Args:
+            table (ShapeTable): The compiled footprint of the shape.
+            row (int): The row of the top of the shape.
+            col (int): The left most column of the shape.
+        """
+        grid = self._grid
+        if len(grid) <= row:
+            grid.extend([0] * (row + 1 - len(grid)))
+        for d_row, mask in enumerate(table.row_masks):
+            grid[row - d_row] |= mask << col
+        skyline = self._skyline
+        for d_col, d_row in enumerate(table.top):
+            skyline[col + d_col] = row - d_row
+        if col < self._dirty_low:
+            self._dirty_low = col
+        high_col = col + table.width - 1
+        if high_col > self._dirty_high:
+            self._dirty_high = high_col
+
     def update_height(self, input_shape_coord):
         """
         Calculate and Update the max height of the grid.
@@ -120,8 +600,8 @@ class TetrisEngine(object):
               the last input shape was placed.
         """
         row = input_shape_coord.row
-        if self.__height < row:
-            self.__height = row
+        if self._height < row:
+            self._height = row
 
     def mark_coords_occupied_by_shape(self, coords):
         """
@@ -130,20 +610,21 @@ class TetrisEngine(object):
         Args:
             coords (list(Coordinate)): A list of Coordinate to mark occupied.
         """
-        # Also mark all coordinates underneath the shape
-        # as blocked if not already occupied.
+        # All coordinates underneath the shape are implicitly blocked
+        # by raising the skyline of their column.
+        skyline = self._skyline
+        grid = self._grid
         for coord in coords:
-            row = coord.row
-            col = coord.col
-            while(row >= 0):
-                if self._grid[row][col] != State.OCCUPIED:
-                    # do not overwrite the one used by an input.
-                    self._grid[row][col] = State.BLOCKED
-                    # print("Marked {} BLOCKED".format(Coordinate(row, col)))
-                row = row - 1
+            if len(grid) <= coord.row:
+                grid.extend([0] * (coord.row + 1 - len(grid)))
             # mark the current input's coordinate as occupied.
-            self._grid[coord.row][coord.col] = State.OCCUPIED
-            # print("Marked {} OCCUPIED".format(coord))
+            grid[coord.row] |= 1 << coord.col
+            if skyline[coord.col] < coord.row:
+                skyline[coord.col] = coord.row
+            if coord.col < self._dirty_low:
+                self._dirty_low = coord.col
+            if coord.col > self._dirty_high:
+                self._dirty_high = coord.col
 
     def is_unoccupied(self, coords):
         """
@@ -153,13 +634,10 @@ class TetrisEngine(object):
         Returns:
             bool: True if they can be occupied in the Grid else False.
         """
-
         for coord in coords:
-            row = coord.row
-            col = coord.col
             if self.is_coord_out_of_bounds(coord):
                 return False
-            if self._grid[row][col] != State.UNOCCUPIED:
+            if coord.row <= self._skyline[coord.col]:
                 return False
         return True
 
@@ -174,31 +652,48 @@ class TetrisEngine(object):
         """
         row = coord.row
         col = coord.col
-        if row >= self.rows or row < 0:
+        if row < 0 or (self.rows is not None and row >= self.rows):
             return True
         if col >= self.cols or col < 0:
             return True
         return False
 
-    def check_and_remove_filled_rows(self):
+    def check_and_remove_filled_rows(self, low_row=0, high_row=None):
         """
-        Check and remove a row which has all cells
+        Check and remove the rows which have all cells
         occupied.
+
+        Args:
+            low_row (int): The lowest row to check.
+            high_row (int): The highest row to check, defaults to the
+              max height of the grid.
+
+        Returns:
+            list(int): The removed rows, in increasing order.
         """
+        grid = self._grid
         # we only check till the max height of the grid
-        found_rows_to_remove = True
-        # we repeat search untill no rows to remove!
-        while (found_rows_to_remove):
-            found_rows_to_remove = False
-            for row in range(self.height):
-                all_occupied = all(
-                    [self._grid[row][col] == State.OCCUPIED for col in range(self.cols)])
-                if all_occupied:
-                    logger.info("Row - {} to be removed".format(row))
-                    self.remove_row(row)
-                    # Repeat the search again!
-                    found_rows_to_remove = True
-                    continue
+        if high_row is None or high_row >= len(grid):
+            high_row = min(self.height, len(grid)) - 1
+        full_row = self._full_row
+        filled_rows = [row for row in range(low_row, high_row + 1)
+                       if grid[row] == full_row]
+        if not filled_rows:
+            return filled_rows
+        for removed, row in enumerate(filled_rows):
+            # rows below this one were already removed.
+            logger.debug("Row - %s to be removed", row - removed)
+        # Compact all the rows in one go, the higher rows move down on
+        # their own.
+        grid[low_row:high_row + 1] = [
+            mask for mask in grid[low_row:high_row + 1] if mask != full_row]
+        # Every column reaches a filled row, so all of them drop. They
+        # were all raised to fill it, the dirty range already covers them.
+        removed = len(filled_rows)
+        self._skyline = [top - removed for top in self._skyline]
+        self._height -= removed
+        self.n_rows_cleared += removed
+        return filled_rows
 
     def remove_row(self, row):
         """
@@ -207,12 +702,11 @@ class TetrisEngine(object):
         Args:
             row (int): The row.
         """
-        # We copy the higher row to lower row until max height.
-        for cur_row in range(row + 1, self.height):
-            self._grid[cur_row - 1] = self._grid[cur_row]
-
-        # Now just reinitialize the height row with unoccupied.
-        self._grid[self.__height] = [
-            State.UNOCCUPIED for col in range(self.cols)]
+        # The higher rows move down on their own.
+        del self._grid[row]
+        # Every column reaching the removed row drops by one.
+        self._skyline = [
+            top - 1 if top >= row else top for top in self._skyline]
         # reduce the max height too.
-        self.__height -= 1
+        self._height -= 1
+        self.n_rows_cleared += 1
@@ -0,0 +1,294 @@
+from itertools import chain
+
+try:
+    import numpy as np
+except ImportError:  # numpy is an optional dependency.
+    np = None
+
+from tetris_engine.engine import GRID_MAX_COLS
+from tetris_engine.engine import GRID_MAX_ROWS
+from tetris_engine.engine import HEIGHT_INIT
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine.shapes import InShape
+from tetris_engine.shapes import SHAPE_IDS
+from tetris_engine.shapes import SHAPE_TABLES
+
+
+# Padding for the bottom profile of the columns a shape does not span,
+# low enough to never decide the landing row.
+NO_COLUMN = -(1 << 40)
+
+
+class ShapeArrays(object):
+    """
+    The footprints of a set of shapes packed into arrays, indexed by
+    the position of the shape in the set.
+    """
+
+    def __init__(self, tables):
+        """
+        Args:
+            tables (list(ShapeTable)): The compiled shapes.
+        """
+        max_width = max(table.width for table in tables)
+        max_height = max(table.height for table in tables)
+        self.max_height = max_height
+        self.width = np.array([table.width for table in tables])
+        self.bottom = np.full((len(tables), max_width), NO_COLUMN)
+        self.top = np.zeros((len(tables), max_width), dtype=np.int64)
+        self.row_counts = np.zeros((len(tables), max_height), dtype=np.int64)
+        for idx, table in enumerate(tables):
+            self.bottom[idx, :table.width] = table.bottom
+            self.top[idx, :table.width] = table.top
+            self.row_counts[idx, :table.height] = [
+                bin(mask).count("1") for mask in table.row_masks]
+
+
+class LockstepEngine(object):
+    """
+    Simulates a batch of independent games on grids of the same size,
+    advancing all of them by one shape per step.
+
+    It follows the rules of TetrisEngine: a game keeps the skyline of
+    its columns and the number of occupied cells per row, which is all
+    that landing and removing filled rows depend on.
+    """
+
+    def __init__(self, n_games, tot_rows=GRID_MAX_ROWS,
+                 tot_cols=GRID_MAX_COLS):
+        """
+        Args:
+            n_games (int): The number of games simulated together.
+            tot_rows (int): Tot rows in the Grid, None for a grid
+              without a height limit.
+            tot_cols (int): Tot columns in the Grid.
+        """
+        if np is None:
+            raise TetrisEngineException("LockstepEngine requires numpy")
+        self.n_games = n_games
+        self.rows = tot_rows
+        self.cols = tot_cols
+        # The current height of each game.
+        self.heights = None
+        # Games that hit an input which cannot be placed, they take
+        # no further steps.
+        self.failed = None
+        self._skyline = None
+        self._fill = None
+
+    def initialize(self):
+        """
+        Reset/Initialize all the games.
+        """
+        rows = self.rows if self.rows is not None else GRID_MAX_ROWS
+        self.heights = np.zeros(self.n_games, dtype=np.int64)
+        self.failed = np.zeros(self.n_games, dtype=bool)
+        self._skyline = np.full(
+            (self.n_games, self.cols), HEIGHT_INIT, dtype=np.int64)
+        self._fill = np.zeros((self.n_games, rows), dtype=np.int64)
+
+    def step(self, shapes, shape_idx, cols, active):
+        """
+        Place one shape in each active game.
+
+        Args:
+            shapes (ShapeArrays): The shapes to place.
+            shape_idx (ndarray): Index in shapes of the shape per game.
+            cols (ndarray): The left most column of the shape per game.
+            active (ndarray): True for the games that take this step.
+
+        Returns:
+            ndarray: The row at which the shape of each game was placed,
+              HEIGHT_INIT for the games that did not place one.
+        """
+        placed_rows = np.full(self.n_games, HEIGHT_INIT, dtype=np.int64)
+        games = np.nonzero(active & ~self.failed)[0]
+        shape_idx = shape_idx[games]
+        cols = cols[games]
+        width = shapes.width[shape_idx]
+        fits = (cols >= 0) & (cols + width <= self.cols)
+        self.failed[games[~fits]] = True
+        games, shape_idx, cols, width = (
+            games[fits], shape_idx[fits], cols[fits], width[fits])
+
+        # Land every shape on the skyline of its columns.
+        d_col = np.arange(shapes.bottom.shape[1])
+        spanned = d_col < width[:, None]
+        col_idx = np.minimum(cols[:, None] + d_col, self.cols - 1)
+        skyline = self._skyline[games[:, None], col_idx]
+        rows = (skyline + 1 + shapes.bottom[shape_idx]).max(axis=1)
+        if self.rows is not None:
+            fits = rows < self.rows
+            self.failed[games[~fits]] = True
+            games, shape_idx, rows, col_idx, spanned = (
+                games[fits], shape_idx[fits], rows[fits], col_idx[fits],
+                spanned[fits])
+        elif len(rows) and rows.max() >= self._fill.shape[1]:
+            self._grow(rows.max() + 1)
+
+        # Mark the shapes occupied.
+        new_skyline = rows[:, None] - shapes.top[shape_idx]
+        self._skyline[np.broadcast_to(games[:, None], spanned.shape)[spanned],
+                      col_idx[spanned]] = new_skyline[spanned]
+        for d_row in range(shapes.max_height):
+            counts = shapes.row_counts[shape_idx, d_row]
+            marked = counts > 0
+            self._fill[games[marked], rows[marked] - d_row] += counts[marked]
+        self.heights[games] = np.maximum(self.heights[games], rows + 1)
+        placed_rows[games] = rows
+
+        # Only the rows the shapes were placed on can have been filled.
+        touched = rows[:, None] - np.arange(shapes.max_height)
+        filled = (self._fill[games[:, None], np.maximum(touched, 0)]
+                  == self.cols) & (touched >= 0)
+        removed = filled.sum(axis=1)
+        self._remove_filled_rows(games[removed > 0], removed[removed > 0])
+        return placed_rows
+
+    def _grow(self, min_rows):
+        """
+        Grow the rows of the games to at least min_rows.
+
+        Args:
+            min_rows (int): The number of rows needed.
+        """
+        rows = max(min_rows, 2 * self._fill.shape[1])
+        extra = np.zeros(
+            (self.n_games, rows - self._fill.shape[1]), dtype=np.int64)
+        self._fill = np.concatenate([self._fill, extra], axis=1)
+
+    def _remove_filled_rows(self, games, removed):
+        """
+        Remove the filled rows of the given games.
+
+        Args:
+            games (ndarray): The games with filled rows.
+            removed (ndarray): The number of filled rows per game.
+        """
+        if not len(games):
+            return
+        fill = self._fill[games]
+        kept = fill != self.cols
+        # Move the kept rows down, keeping their order, and empty
+        # the rows above them.
+        order = np.argsort(~kept, axis=1, kind="stable")
+        fill = np.take_along_axis(fill, order, axis=1)
+        fill[np.arange(fill.shape[1]) >= kept.sum(axis=1)[:, None]] = 0
+        self._fill[games] = fill
+        # Every column reaches a filled row, so all of them drop.
+        self._skyline[games] -= removed[:, None]
+        self.heights[games] -= removed
+
+
+def pack_codes(runs):
+    """
+    Pack runs of (shape id, col) codes into the arrays of
+    run_lockstep_arrays.
+
+    Args:
+        runs (list(list(tuple(int, int)))): The codes of each run, e.g
+          from parse_codes or iter_codes.
+
+    Returns:
+        tuple(ndarray, ndarray, ndarray): The shape ids and left cols,
+          one row per run padded with zeros, and the length of each run.
+    """
+    lengths = np.fromiter(map(len, runs), dtype=np.int64, count=len(runs))
+    total = int(lengths.sum())
+    codes = np.fromiter(chain.from_iterable(chain.from_iterable(runs)),
+                        dtype=np.int64, count=2 * total).reshape(total, 2)
+    return _pad_runs(codes[:, 0], codes[:, 1], lengths)
+
+
+def pack_arrays(runs):
+    """
+    Pack runs given as arrays into the arrays of run_lockstep_arrays.
+
+    Args:
+        runs (list(tuple(buffer, buffer))): The shape ids and the left
+          cols of each run, e.g from SequenceReader.get_run.
+
+    Returns:
+        tuple(ndarray, ndarray, ndarray): See pack_codes.
+    """
+    lengths = np.fromiter((len(shape_ids) for shape_ids, _cols in runs),
+                          dtype=np.int64, count=len(runs))
+    if not len(runs):
+        empty = np.zeros(0, dtype=np.int64)
+        return _pad_runs(empty, empty, lengths)
+    return _pad_runs(
+        np.concatenate([np.asarray(shape_ids) for shape_ids, _ in runs]),
+        np.concatenate([np.asarray(cols) for _, cols in runs]), lengths)
+
+
+def _pad_runs(shape_ids, cols, lengths):
+    """
+    Lay out the inputs of all the runs, in order, one row per run.
+    """
+    length = int(lengths.max()) if len(lengths) else 0
+    games = np.repeat(np.arange(len(lengths)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    steps = np.arange(len(games)) - np.repeat(starts, lengths)
+    padded_ids = np.zeros((len(lengths), length), dtype=np.int64)
+    padded_cols = np.zeros((len(lengths), length), dtype=np.int64)
+    padded_ids[games, steps] = shape_ids
+    padded_cols[games, steps] = cols
+    return padded_ids, padded_cols, lengths
+
+
+def run_lockstep(runs, tot_rows=GRID_MAX_ROWS, tot_cols=GRID_MAX_COLS):
+    """
+    Simulate runs of inputs in lockstep.
+
+    Args:
+        runs (list(list)): The (shape id, col) codes of each run, or
+          its InShape inputs.
+        tot_rows (int): Tot rows in the Grid, None for a grid
+          without a height limit.
+        tot_cols (int): Tot columns in the Grid.
+
+    Returns:
+        tuple(ndarray, ndarray): The max height of each run, and True
+          for the runs stopped at an input which cannot be placed.
+    """
+    if np is None:
+        raise TetrisEngineException("run_lockstep requires numpy")
+    first = next((run[0] for run in runs if len(run)), None)
+    if isinstance(first, InShape):
+        runs = [[(SHAPE_IDS[input_shape.shape_type], input_shape.left_col)
+                 for input_shape in run] for run in runs]
+    return run_lockstep_arrays(*pack_codes(runs), tot_rows=tot_rows,
+                               tot_cols=tot_cols)
+
+
+def run_lockstep_arrays(shape_ids, cols, lengths, tot_rows=GRID_MAX_ROWS,
+                        tot_cols=GRID_MAX_COLS):
+    """
+    Simulate runs of inputs packed into arrays in lockstep.
+
+    Args:
+        shape_ids (ndarray): The shape id of each input, one row per run.
+        cols (ndarray): The left col of each input, one row per run.
+        lengths (ndarray): The number of inputs of each run.
+        tot_rows (int): Tot rows in the Grid, None for a grid
+          without a height limit.
+        tot_cols (int): Tot columns in the Grid.
+
+    Returns:
+        tuple(ndarray, ndarray): See run_lockstep.
+    """
+    if np is None:
+        raise TetrisEngineException("run_lockstep requires numpy")
+    engine = LockstepEngine(len(lengths), tot_rows, tot_cols)
+    engine.initialize()
+    length = shape_ids.shape[1] if shape_ids.ndim == 2 else 0
+    if length:
+        # Only the shapes used are packed, by their index in used_ids.
+        used_ids, shape_idx = np.unique(shape_ids, return_inverse=True)
+        shape_idx = shape_idx.reshape(shape_ids.shape)
+        shapes = ShapeArrays([SHAPE_TABLES[shape_id]
+                              for shape_id in used_ids.tolist()])
+        for step in range(length):
+            engine.step(shapes, shape_idx[:, step], cols[:, step],
+                        step < lengths)
+    return engine.heights, engine.failed
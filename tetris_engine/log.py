@@ -6,7 +6,11 @@ LOG_DEBUG_ENV = "TETRIS_ENGINE_DEBUG"
 FORMATTER = logging.Formatter(
     "%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
-LOG_LEVEL = logging.DEBUG if os.getenv(LOG_DEBUG_ENV) else logging.INFO
+# Quiet by default, only warnings and errors are emitted.
+LOG_LEVEL = logging.DEBUG if os.getenv(LOG_DEBUG_ENV) else logging.WARNING
+
+# Names of the loggers handed out by get_logger.
+_logger_names = set()
 
 
 def get_console_handler():
@@ -18,6 +22,72 @@ def get_console_handler():
     return console_handler
 
 
+class BackgroundHandler(logging.Handler):
+    """
+    Queues records for a listener thread that writes them to the
+    console, so a slow stdout never stalls the caller.
+
+    The thread is only started on the first record emitted in a
+    process, which also covers forked worker processes. The queue
+    machinery is imported at that point too, a run that logs nothing
+    never pays for it. Flushing writes out the queued records and
+    stops the thread, the next record starts a new one on the current
+    stdout.
+    """
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self._queue_handler = None
+        self._listener = None
+        self._pid = None
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start_listener()
+        self._queue_handler.emit(record)
+
+    def flush(self):
+        """
+        Write out the queued records and stop the listener thread of
+        this process.
+        """
+        self.acquire()
+        try:
+            if self._pid == os.getpid():
+                # Stopping the listener drains the queue first.
+                self._listener.stop()
+                self._listener.handlers[0].flush()
+            self._queue_handler = None
+            self._listener = None
+            self._pid = None
+        finally:
+            self.release()
+
+    def close(self):
+        """
+        Flush the queued records and close the handler, called by
+        logging.shutdown at exit.
+        """
+        self.flush()
+        logging.Handler.close(self)
+
+    def _start_listener(self):
+        """
+        Start the listener thread of this process.
+        """
+        import queue
+        from logging.handlers import QueueHandler
+        from logging.handlers import QueueListener
+        records = queue.Queue(-1)
+        self._queue_handler = QueueHandler(records)
+        self._listener = QueueListener(records, get_console_handler())
+        self._listener.start()
+        self._pid = os.getpid()
+
+
+HANDLER = BackgroundHandler()
+
+
 def get_logger(logger_name):
     """
     Args:
@@ -28,6 +98,23 @@ def get_logger(logger_name):
     """
     logger = logging.getLogger(logger_name)
     logger.setLevel(LOG_LEVEL)
-    logger.addHandler(get_console_handler())
+    if HANDLER not in logger.handlers:
+        logger.addHandler(HANDLER)
     logger.propagate = False
+    _logger_names.add(logger_name)
     return logger
+
+
+def set_log_level(level):
+    """
+    Set the level of all the loggers, after writing out the records
+    logged at the previous level.
+
+    Args:
+        level (int): The logging level (e.g logging.INFO).
+    """
+    global LOG_LEVEL
+    HANDLER.flush()
+    LOG_LEVEL = level
+    for logger_name in _logger_names:
+        logging.getLogger(logger_name).setLevel(level)
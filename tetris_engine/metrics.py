@@ -0,0 +1,202 @@
+"""
+Export the counters of engines in the Prometheus text format, to a file
+for the textfile collector of node_exporter or from a local HTTP
+endpoint, so that long running jobs can be watched without logging.
+"""
+import os
+import threading
+
+from tetris_engine.log import get_logger
+
+logger = get_logger(__name__)
+
+PREFIX = "tetris_engine"
+# Name, Prometheus type and help of every counter of TetrisEngine.stats.
+METRICS = (
+    ("pieces_placed", "counter", "Shapes placed on the grid."),
+    ("rows_cleared", "counter", "Filled rows removed from the grid."),
+    ("probe_iterations", "counter",
+     "Iterations of the loop finding the landing row of a shape."),
+    ("overflow_errors", "counter", "Shapes that could not be placed."),
+    ("peak_height", "gauge", "Highest max height of the grid reached."),
+)
+# Seconds between two writes of the metrics file.
+DEFAULT_INTERVAL = 10.0
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def add_metrics_arguments(parser):
+    """
+    Add the options of the metrics exporter to a command.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser of the command.
+    """
+    parser.add_argument("--metrics-file",
+                        help="Write the engine counters in the Prometheus "
+                        "text format to this file, every {:g}s".format(
+                            DEFAULT_INTERVAL))
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve the engine counters in the Prometheus "
+                        "text format on http://127.0.0.1:PORT/metrics")
+
+
+def merge_stats(all_stats):
+    """
+    Merge the stats of several engines, counters are added up and the
+    peak height is the highest one.
+
+    Args:
+        all_stats (iterable(dict)): Stats returned by TetrisEngine.stats.
+
+    Returns:
+        dict: The merged stats.
+    """
+    merged = dict((name, 0) for name, _type, _help in METRICS)
+    for stats in all_stats:
+        for name, metric_type, _help in METRICS:
+            if metric_type == "gauge":
+                merged[name] = max(merged[name], stats[name])
+            else:
+                merged[name] += stats[name]
+    return merged
+
+
+def format_metrics(stats, prefix=PREFIX):
+    """
+    Format stats in the Prometheus text format.
+
+    Args:
+        stats (dict): Stats returned by TetrisEngine.stats.
+        prefix (str): The prefix of the metric names.
+
+    Returns:
+        str: The metrics, counters get the _total suffix.
+    """
+    lines = []
+    for name, metric_type, help_text in METRICS:
+        metric = "{}_{}".format(prefix, name)
+        if metric_type == "counter":
+            metric += "_total"
+        lines.append("# HELP {} {}".format(metric, help_text))
+        lines.append("# TYPE {} {}".format(metric, metric_type))
+        lines.append("{} {}".format(metric, stats[name]))
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(file_path, stats, prefix=PREFIX):
+    """
+    Write stats in the Prometheus text format to a file, replacing it
+    at once so that a reader never sees a partial file.
+
+    Args:
+        file_path (str): Path to the metrics file.
+        stats (dict): Stats returned by TetrisEngine.stats.
+        prefix (str): The prefix of the metric names.
+    """
+    tmp_path = "{}.{}.tmp".format(file_path, os.getpid())
+    with open(tmp_path, "w") as fp:
+        fp.write(format_metrics(stats, prefix))
+    os.replace(tmp_path, file_path)
+
+
+class MetricsExporter(object):
+    """
+    Exports the stats of a source periodically to a file and/or on
+    demand from a local HTTP endpoint, from background threads.
+    """
+
+    def __init__(self, get_stats, file_path=None, port=None,
+                 host="127.0.0.1", interval=DEFAULT_INTERVAL,
+                 prefix=PREFIX):
+        """
+        Args:
+            get_stats (callable): Returns the current stats, e.g
+              TetrisEngine.stats.
+            file_path (str): Path to the metrics file, None for no file.
+            port (int): The port to serve /metrics on, None for no
+              endpoint, 0 for any free port.
+            host (str): The host to serve /metrics on.
+            interval (float): Seconds between two writes of the file.
+            prefix (str): The prefix of the metric names.
+        """
+        self.get_stats = get_stats
+        self.file_path = file_path
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self.prefix = prefix
+        self._stop = threading.Event()
+        self._writer = None
+        self._server = None
+
+    def start(self):
+        """
+        Start exporting.
+        """
+        if self.file_path is not None:
+            self._writer = threading.Thread(target=self._write_loop)
+            self._writer.daemon = True
+            self._writer.start()
+        if self.port is not None:
+            self._start_server()
+        return self
+
+    def stop(self):
+        """
+        Stop exporting, the file is written a last time.
+        """
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _write_loop(self):
+        write_metrics(self.file_path, self.get_stats(), self.prefix)
+        while not self._stop.wait(self.interval):
+            write_metrics(self.file_path, self.get_stats(), self.prefix)
+        # The final counters.
+        write_metrics(self.file_path, self.get_stats(), self.prefix)
+
+    def _start_server(self):
+        # Only the exporters serving HTTP pay for importing http.server.
+        from http.server import BaseHTTPRequestHandler
+        from http.server import ThreadingHTTPServer
+
+        exporter = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = format_metrics(exporter.get_stats(),
+                                      exporter.prefix).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port),
+                                           MetricsHandler)
+        self._server.daemon_threads = True
+        # The port actually bound, when any free port was asked for.
+        self.port = self._server.server_address[1]
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        logger.info("Serving metrics on http://{}:{}/metrics".format(
+            self.host, self.port))
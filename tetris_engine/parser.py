@@ -0,0 +1,92 @@
+from tetris_engine.shapes import SHAPE_CLASSES
+from tetris_engine.shapes import SHAPE_IDS
+
+
+# Codes of the input strings seen so far, an input file only has a
+# handful of distinct ones (7 shapes times the number of columns).
+_INPUT_CODES = {}
+_DIGITS = "0123456789"
+
+
+def get_input_code(input_str):
+    """
+    Get the (shape id, col) code of an input string.
+
+    Args:
+        input_str (string): An input string rerpesenting
+          an InShape (e.g 'S0', 'Z1', 'T12')
+    Returns:
+        tuple(int, int): The shape id and the left col of the input.
+    """
+    # The shape type is everything before the column, registered shapes
+    # can have longer names than a letter (e.g 'Tr4').
+    shape_type = input_str.rstrip(_DIGITS)
+    if shape_type.endswith("-"):
+        shape_type = shape_type[:-1]
+    try:
+        return SHAPE_IDS[shape_type], int(input_str[len(shape_type):])
+    except (KeyError, ValueError):
+        raise IOError("Inavlid Input - {}".format(input_str))
+
+
+def get_input_shape(input_str):
+    """
+    Get the InShape object based of input string.
+
+    Args:
+        input_str (string): An input string rerpesenting
+          an InShape (e.g 'S0', 'Z1', 'T12')
+    Returns:
+        InShape: An InShape obj based on the input string.
+    """
+    shape_id, left_col = get_input_code(input_str)
+    return SHAPE_CLASSES[shape_id](left_col=left_col)
+
+
+def parse_codes(line):
+    """
+    Parse a line of input into (shape id, col) codes.
+
+    Args:
+        line (str): A comma separated line of inputs (e.g 'Q0,I12').
+
+    Returns:
+        list(tuple(int, int)): The shape id and left col of each input.
+    """
+    input_strs = line.strip().split(',')
+    try:
+        return [_INPUT_CODES[input_str] for input_str in input_strs]
+    except KeyError:
+        # Seen for the first time, parse and remember them.
+        for input_str in input_strs:
+            if input_str not in _INPUT_CODES:
+                _INPUT_CODES[input_str] = get_input_code(input_str)
+        return [_INPUT_CODES[input_str] for input_str in input_strs]
+
+
+def parse_line(line):
+    """
+    Parse a line of input.
+
+    Args:
+        line (str): A comma separated line of inputs (e.g 'Q0,I2').
+
+    Returns:
+        list(InShape): The InShape inputs of the line.
+    """
+    return [SHAPE_CLASSES[shape_id](left_col=left_col)
+            for shape_id, left_col in parse_codes(line)]
+
+
+def iter_codes(fp):
+    """
+    Parse the lines of an input file, one line at a time.
+
+    Args:
+        fp (file): The opened input file.
+
+    Yields:
+        list(tuple(int, int)): The codes of the inputs of a line.
+    """
+    for line in fp:
+        yield parse_codes(line)
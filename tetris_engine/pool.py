@@ -0,0 +1,90 @@
+"""
+A pool of engines that can be borrowed and given back, so that callers
+simulating many runs do not allocate a new engine for each of them.
+"""
+from contextlib import contextmanager
+
+from tetris_engine.engine import GRID_MAX_COLS
+from tetris_engine.engine import GRID_MAX_ROWS
+from tetris_engine.engine import TetrisEngine
+
+
+# Idle engines kept per grid size, the extra ones given back are dropped.
+DEFAULT_MAX_IDLE = 8
+
+
+class EnginePool(object):
+    """
+    Keeps idle engines per engine class and grid size. An engine given
+    back keeps its grid, so borrowing it again only resets what its
+    last run touched.
+    """
+
+    def __init__(self, max_idle=DEFAULT_MAX_IDLE):
+        """
+        Args:
+            max_idle (int): The number of idle engines kept per grid size.
+        """
+        self.max_idle = max_idle
+        self._idle = {}
+
+    def acquire(self, tot_rows=GRID_MAX_ROWS, tot_cols=GRID_MAX_COLS,
+                engine_class=TetrisEngine):
+        """
+        Take an engine out of the pool, a new one if none is idle.
+
+        Args:
+            tot_rows (int): Tot rows in the Grid, None for a grid
+              without a height limit.
+            tot_cols (int): Tot columns in the Grid.
+            engine_class (type): TetrisEngine or a subclass of it.
+
+        Returns:
+            TetrisEngine: An initialized engine.
+        """
+        try:
+            engine = self._idle[engine_class, tot_rows, tot_cols].pop()
+        except (KeyError, IndexError):
+            engine = engine_class(tot_rows, tot_cols)
+        engine.initialize()
+        return engine
+
+    def release(self, engine):
+        """
+        Give an engine back to the pool.
+
+        Args:
+            engine (TetrisEngine): An engine taken with acquire.
+        """
+        idle = self._idle.setdefault(
+            (type(engine), engine.rows, engine.cols), [])
+        if len(idle) < self.max_idle:
+            idle.append(engine)
+
+    @contextmanager
+    def borrow(self, tot_rows=GRID_MAX_ROWS, tot_cols=GRID_MAX_COLS,
+               engine_class=TetrisEngine):
+        """
+        Borrow an engine for the duration of a with block.
+
+        Args:
+            tot_rows (int): Tot rows in the Grid, None for a grid
+              without a height limit.
+            tot_cols (int): Tot columns in the Grid.
+            engine_class (type): TetrisEngine or a subclass of it.
+
+        Yields:
+            TetrisEngine: An initialized engine.
+        """
+        engine = self.acquire(tot_rows, tot_cols, engine_class)
+        try:
+            yield engine
+        finally:
+            self.release(engine)
+
+    def __len__(self):
+        return sum(len(idle) for idle in self._idle.values())
+
+
+# The pool shared by the callers of a process.
+ENGINE_POOL = EnginePool()
@@ -0,0 +1,224 @@
+"""
+Timing of the phases and runs of the tetris_engine command, and
+profiles of it for pstats or flamegraph tools.
+"""
+import heapq
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+
+
+PHASES = ("parse", "simulate", "write")
+PERCENTILES = (50, 95, 99)
+# Number of slowest runs reported.
+TOP_RUNS = 5
+PROFILE_FORMATS = ("pstats", "collapsed")
+# Seconds between two samples of the collapsed stack profile.
+SAMPLE_INTERVAL = 0.001
+
+
+def percentile(sorted_values, percent):
+    """
+    Returns the nearest rank percentile of sorted values.
+
+    Args:
+        sorted_values (list(float)): The values, in increasing order.
+        percent (int): The percentile, between 0 and 100.
+
+    Returns:
+        float: The percentile, 0.0 without values.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = -(-percent * len(sorted_values) // 100)
+    return sorted_values[max(rank, 1) - 1]
+
+
+class RunStats(object):
+    """
+    Times the phases of the command and every run it simulates.
+    """
+
+    def __init__(self, top_runs=TOP_RUNS):
+        """
+        Args:
+            top_runs (int): The number of slowest runs kept.
+        """
+        self.phases = dict((phase, 0.0) for phase in PHASES)
+        # Seconds simulating each run, in input order.
+        self.latencies = array("d")
+        self.pieces = 0
+        self.lines_cleared = 0
+        # Runs answered without simulating them, e.g from a cache.
+        self.skipped_runs = 0
+        self.top_runs = top_runs
+        # (seconds, run index, number of pieces) of the slowest runs.
+        self._slowest = []
+        self._start = time.perf_counter()
+
+    def timed(self, iterable, phase):
+        """
+        Add the time spent producing each item of an iterable to a phase.
+
+        Args:
+            iterable (iterable): The items.
+            phase (str): The phase, one of PHASES.
+
+        Yields:
+            The items of the iterable.
+        """
+        iterator = iter(iterable)
+        clock = time.perf_counter
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.phases[phase] += clock() - start
+                return
+            self.phases[phase] += clock() - start
+            yield item
+
+    def add_phase(self, phase, seconds):
+        """
+        Add time to a phase.
+        """
+        self.phases[phase] += seconds
+
+    def add_run(self, seconds, codes, rows_cleared):
+        """
+        Record a simulated run.
+
+        Args:
+            seconds (float): The time spent simulating it.
+            codes (list(tuple(int, int))): Its (shape id, col) codes.
+            rows_cleared (int): The rows it removed from the grid.
+        """
+        run_idx = len(self.latencies) + self.skipped_runs
+        self.latencies.append(seconds)
+        self.phases["simulate"] += seconds
+        self.pieces += len(codes)
+        self.lines_cleared += rows_cleared
+        entry = (seconds, run_idx, len(codes))
+        if len(self._slowest) < self.top_runs:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def skip_run(self):
+        """
+        Record a run answered without simulating it.
+        """
+        self.skipped_runs += 1
+
+    def report(self):
+        """
+        Returns the report of the phases and runs, one stat per line.
+        """
+        wall = time.perf_counter() - self._start
+        simulate = self.phases["simulate"]
+        latencies = sorted(self.latencies)
+        lines = ["Wall time: {:.3f}s".format(wall)]
+        for phase in PHASES:
+            lines.append("  {}: {:.3f}s".format(phase, self.phases[phase]))
+        lines.append("  other: {:.3f}s".format(
+            max(wall - sum(self.phases.values()), 0.0)))
+        lines.append("Runs: {} simulated, {} skipped".format(
+            len(latencies), self.skipped_runs))
+        lines.append("Pieces: {} ({:.0f} pieces/sec)".format(
+            self.pieces, self.pieces / simulate if simulate else 0.0))
+        lines.append("Lines cleared: {}".format(self.lines_cleared))
+        lines.append("Run latency: " + ", ".join(
+            ["p{} {:.1f}us".format(percent,
+                                   percentile(latencies, percent) * 1e6)
+             for percent in PERCENTILES]
+            + ["max {:.1f}us".format(
+                (latencies[-1] if latencies else 0.0) * 1e6)]))
+        for seconds, run_idx, n_pieces in sorted(self._slowest,
+                                                  reverse=True):
+            lines.append("  line {}: {:.1f}us, {} pieces".format(
+                run_idx + 1, seconds * 1e6, n_pieces))
+        return "\n".join(lines) + "\n"
+
+
+class StackSampler(object):
+    """
+    Samples the stack of a thread from a background thread, counting
+    every distinct stack in the collapsed format of flamegraph tools.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, thread_id=None):
+        """
+        Args:
+            interval (float): Seconds between two samples.
+            thread_id (int): The thread to sample, the calling one by
+              default.
+        """
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append("{}:{}".format(
+                    os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def write(self, file_path):
+        """
+        Write the stacks as 'frame;frame;... count' lines.
+        """
+        with open(file_path, "w") as fp:
+            for stack, count in self.stacks.most_common():
+                fp.write("{} {}\n".format(stack, count))
+
+
+@contextmanager
+def profile_to(file_path, profile_format=PROFILE_FORMATS[0]):
+    """
+    Profile the body of a with block into a file.
+
+    Args:
+        file_path (str): The file to write the profile to.
+        profile_format (str): 'pstats' for a cProfile dump, 'collapsed'
+          for sampled stacks in the collapsed format of flamegraph
+          tools.
+    """
+    if profile_format == "collapsed":
+        profiler = StackSampler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            profiler.write(file_path)
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(file_path)
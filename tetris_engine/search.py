@@ -0,0 +1,262 @@
+"""
+Search for the best placement of the next shape, looking ahead at the
+shapes coming after it.
+
+Every legal column of the next shape is scored by a beam search over
+the placements of the following shapes. Boards are forked with
+TetrisEngine.clone and their features are kept in a transposition
+table keyed on the board, so a board reached by several paths is only
+measured once.
+"""
+from collections import namedtuple
+from heapq import nlargest
+
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine.shapes import SHAPE_TABLES
+
+
+# Number of shapes looked at, the next one included.
+DEFAULT_DEPTH = 2
+# Boards kept at every depth of the beam search.
+DEFAULT_BEAM_WIDTH = 8
+
+
+class Weights(namedtuple("Weights", ["height", "holes", "lines"])):
+    """
+    Weights of the features of a board, the score of a board is their
+    weighted sum, higher is better.
+
+    Attributes:
+        height (float): Weight of the max height of the grid.
+        holes (float): Weight of the number of cells covered by a
+          shape that can no longer be used.
+        lines (float): Weight of the number of rows removed on the way
+          to the board.
+    """
+    __slots__ = ()
+
+
+DEFAULT_WEIGHTS = Weights(height=-1.0, holes=-4.0, lines=3.0)
+
+
+class BeamSearch(object):
+    """
+    Scores the placements of the next shape with a beam search over the
+    shapes coming after it.
+    """
+
+    def __init__(self, depth=DEFAULT_DEPTH, beam_width=DEFAULT_BEAM_WIDTH,
+                 weights=DEFAULT_WEIGHTS):
+        """
+        Args:
+            depth (int): Number of shapes looked at, the next one
+              included.
+            beam_width (int): Boards kept at every depth.
+            weights (Weights): Weights of the features of a board.
+        """
+        self.depth = depth
+        self.beam_width = beam_width
+        self.weights = weights
+        # Board key to its (height, holes, cells) features.
+        self.table = {}
+        # Number of boards placed and of boards found in the table.
+        self.n_nodes = 0
+        self.n_table_hits = 0
+
+    def get_features(self, engine):
+        """
+        Returns the features of a board, measured once per board.
+
+        Args:
+            engine (TetrisEngine): The board.
+
+        Returns:
+            tuple(int, int, int): The max height, the number of holes
+              and the number of occupied cells.
+        """
+        key = engine.board_key()
+        features = self.table.get(key)
+        if features is None:
+            cells = engine.count_cells()
+            # Every cell below the height of its column that is not
+            # occupied is BLOCKED.
+            holes = sum(engine.column_heights()) - cells
+            features = self.table[key] = (engine.height, holes, cells)
+        else:
+            self.n_table_hits += 1
+        return features
+
+    def score(self, engine, lines):
+        """
+        Returns the score of a board.
+
+        Args:
+            engine (TetrisEngine): The board.
+            lines (int): Rows removed on the way to the board.
+
+        Returns:
+            float: The score, higher is better.
+        """
+        height, holes, _ = self.get_features(engine)
+        weights = self.weights
+        return (weights.height * height + weights.holes * holes
+                + weights.lines * lines)
+
+    def expand(self, engine, lines, shape_id):
+        """
+        Place a shape at every legal column of a board.
+
+        Args:
+            engine (TetrisEngine): The board, left unchanged.
+            lines (int): Rows removed on the way to the board.
+            shape_id (int): The id of the shape to place.
+
+        Yields:
+            tuple(int, TetrisEngine, int): The column, the board after
+              the placement and the rows removed on the way to it.
+        """
+        table = SHAPE_TABLES[shape_id]
+        cells = self.get_features(engine)[2]
+        for col in range(engine.cols - table.width + 1):
+            child = engine.clone()
+            try:
+                child.place(shape_id, col)
+            except TetrisEngineException:
+                continue
+            self.n_nodes += 1
+            removed = (cells + len(table.cells)
+                       - self.get_features(child)[2]) // engine.cols
+            yield col, child, lines + removed
+
+    def search_from(self, engine, lines, shape_ids):
+        """
+        Returns the best score reachable by placing the given shapes on
+        a board.
+
+        Args:
+            engine (TetrisEngine): The board.
+            lines (int): Rows removed on the way to the board.
+            shape_ids (list(int)): The ids of the shapes to place.
+
+        Returns:
+            float: The best score of the boards of the last depth
+              reached, the score of the board itself if no shape fits.
+        """
+        beam = [(self.score(engine, lines), engine, lines)]
+        for shape_id in shape_ids:
+            # Boards reached by several paths are kept once, with the
+            # most rows removed.
+            children = {}
+            for _, node, node_lines in beam:
+                for _, child, child_lines in self.expand(
+                        node, node_lines, shape_id):
+                    key = child.board_key()
+                    if key not in children or \
+                            children[key][2] < child_lines:
+                        children[key] = (
+                            self.score(child, child_lines), child,
+                            child_lines)
+            if not children:
+                break
+            beam = nlargest(self.beam_width, children.values(),
+                            key=lambda node: node[0])
+        return max(node[0] for node in beam)
+
+    def score_columns(self, engine, shape_ids):
+        """
+        Score every legal column of the next shape.
+
+        Args:
+            engine (TetrisEngine): The board, left unchanged.
+            shape_ids (list(int)): The ids of the next shape and of the
+              ones coming after it, only depth of them are looked at.
+
+        Returns:
+            dict(int, float): The score of each legal column.
+        """
+        shape_ids = list(shape_ids)[:self.depth]
+        return dict(
+            (col, self.search_from(child, lines, shape_ids[1:]))
+            for col, child, lines in self.expand(engine, 0, shape_ids[0]))
+
+
+def _score_column(engine_class, snapshot, col, shape_ids, depth, beam_width,
+                  weights):
+    """
+    Score a single column of the next shape, run by a worker process.
+
+    Returns:
+        float: The score, None if the shape cannot be placed.
+    """
+    engine = engine_class()
+    engine.restore(snapshot)
+    search = BeamSearch(depth, beam_width, weights)
+    cells = search.get_features(engine)[2]
+    try:
+        engine.place(shape_ids[0], col)
+    except TetrisEngineException:
+        return None
+    lines = (cells + len(SHAPE_TABLES[shape_ids[0]].cells)
+             - search.get_features(engine)[2]) // engine.cols
+    return search.search_from(engine, lines, shape_ids[1:depth])
+
+
+def score_columns(engine, shape_ids, depth=DEFAULT_DEPTH,
+                  beam_width=DEFAULT_BEAM_WIDTH, weights=DEFAULT_WEIGHTS,
+                  workers=1):
+    """
+    Score every legal column of the next shape.
+
+    Args:
+        engine (TetrisEngine): The board, left unchanged.
+        shape_ids (list(int)): The ids of the next shape and of the ones
+          coming after it.
+        depth (int): Number of shapes looked at, the next one included.
+        beam_width (int): Boards kept at every depth.
+        weights (Weights): Weights of the features of a board.
+        workers (int): Number of processes to spread the columns of the
+          next shape across, 1 to search in this process.
+
+    Returns:
+        dict(int, float): The score of each legal column.
+    """
+    if workers <= 1:
+        search = BeamSearch(depth, beam_width, weights)
+        return search.score_columns(engine, shape_ids)
+    from concurrent.futures import ProcessPoolExecutor
+    shape_ids = list(shape_ids)
+    snapshot = engine.snapshot()
+    cols = range(engine.cols - SHAPE_TABLES[shape_ids[0]].width + 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (col, executor.submit(_score_column, type(engine), snapshot,
+                                  col, shape_ids, depth, beam_width,
+                                  weights))
+            for col in cols]
+        scores = {}
+        for col, future in futures:
+            score = future.result()
+            if score is not None:
+                scores[col] = score
+    return scores
+
+
+def best_placement(engine, shape_ids, **kwargs):
+    """
+    Returns the best column for the next shape.
+
+    Args:
+        engine (TetrisEngine): The board, left unchanged.
+        shape_ids (list(int)): The ids of the next shape and of the ones
+          coming after it.
+        **kwargs: The options of score_columns.
+
+    Returns:
+        tuple(int, float): The left most of the best columns and its
+          score, None if the shape cannot be placed.
+    """
+    scores = score_columns(engine, shape_ids, **kwargs)
+    if not scores:
+        return None
+    col = max(sorted(scores), key=scores.get)
+    return col, scores[col]
@@ -0,0 +1,306 @@
+"""
+Compact binary format for runs of inputs.
+
+    header  MAGIC, version, column size, run count, index offset
+    runs    per run, the shape id of every input (1 byte each) followed
+            by the left col of every input (column size bytes each)
+    index   the offset of every run and the end of the last one (8 bytes
+            each)
+
+All integers are little endian. Files are read through mmap and a run is
+handed out as two memoryviews over the file, without copying.
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from tetris_engine.parser import iter_codes
+from tetris_engine.shapes import SHAPE_CLASSES
+
+MAGIC = b"TETS"
+VERSION = 1
+HEADER = struct.Struct("<4sBBxxQQ")
+# array typecode of the left cols per column size.
+COL_TYPECODES = {1: "B", 2: "H"}
+
+
+def is_sequence_file(file_path):
+    """
+    Check if a file is in the binary sequence format.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        bool: True if the file starts with MAGIC.
+    """
+    with open(file_path, "rb") as fp:
+        return fp.read(len(MAGIC)) == MAGIC
+
+
+class SequenceWriter(object):
+    """
+    Writes runs of (shape id, col) codes to a binary sequence file.
+    """
+
+    def __init__(self, file_path, col_size=1):
+        """
+        Args:
+            file_path (str): Path to the file to write.
+            col_size (int): Bytes per left col, 1 for grids of up to
+              256 columns, else 2.
+        """
+        if col_size not in COL_TYPECODES:
+            raise ValueError("col_size must be 1 or 2")
+        self.col_size = col_size
+        self._file_path = file_path
+        self._fp = open(file_path, "wb")
+        self._fp.write(HEADER.pack(MAGIC, VERSION, col_size, 0, 0))
+        self._offsets = array("Q", [HEADER.size])
+
+    def write_run(self, codes):
+        """
+        Append a run.
+
+        Args:
+            codes (iterable(tuple(int, int))): The (shape id, col) codes
+              of the inputs of the run.
+        """
+        shape_ids = array("B")
+        cols = array(COL_TYPECODES[self.col_size])
+        try:
+            for shape_id, col in codes:
+                shape_ids.append(shape_id)
+                cols.append(col)
+        except OverflowError:
+            raise IOError(
+                "Inavlid Input - col {} does not fit in {} byte(s)".format(
+                    col, self.col_size))
+        if sys.byteorder != "little":
+            cols.byteswap()
+        self._fp.write(shape_ids.tobytes())
+        self._fp.write(cols.tobytes())
+        self._offsets.append(self._offsets[-1] + len(shape_ids) * (
+            1 + self.col_size))
+
+    def close(self):
+        """
+        Write the run index and the header.
+        """
+        index_offset = self._offsets[-1]
+        offsets = array("Q", self._offsets)
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        self._fp.write(offsets.tobytes())
+        self._fp.seek(0)
+        self._fp.write(HEADER.pack(
+            MAGIC, VERSION, self.col_size, len(self._offsets) - 1,
+            index_offset))
+        self._fp.close()
+
+    def discard(self):
+        """
+        Close and remove the file, without writing the run index and the
+        header.
+        """
+        self._fp.close()
+        os.remove(self._file_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        # A half written file must not look like a good one.
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class SequenceReader(object):
+    """
+    Reads the runs of a binary sequence file through mmap.
+    """
+
+    def __init__(self, file_path):
+        """
+        Args:
+            file_path (str): Path to the file to read.
+
+        Raises:
+            IOError: If the file is not a sequence file or is truncated.
+        """
+        with open(file_path, "rb") as fp:
+            try:
+                self._mmap = mmap.mmap(fp.fileno(), 0,
+                                       access=mmap.ACCESS_READ)
+            except ValueError:
+                # An empty file cannot be mapped.
+                raise IOError("{} is not a sequence file".format(file_path))
+        self._file_path = file_path
+        self._n_runs = 0
+        self._view = memoryview(self._mmap)
+        self._offsets = self._view[:0]
+        self._swap = sys.byteorder != "little"
+        if len(self._mmap) < HEADER.size:
+            self._invalid()
+        magic, version, col_size, n_runs, index_offset = \
+            HEADER.unpack_from(self._mmap)
+        # The runs lie between the header and the index, which ends the
+        # file.
+        if (magic != MAGIC or version != VERSION
+                or col_size not in COL_TYPECODES
+                or index_offset < HEADER.size
+                or index_offset + 8 * (n_runs + 1) != len(self._mmap)):
+            self._invalid()
+        self.col_size = col_size
+        self._n_runs = n_runs
+        self._index_offset = index_offset
+        self._offsets = self._view[
+            index_offset:index_offset + 8 * (n_runs + 1)].cast("Q")
+        if (self.get_offset(0) != HEADER.size
+                or self.get_offset(n_runs) != index_offset):
+            self._invalid()
+
+    def _invalid(self):
+        # Raise for a file that is not in the format, or is truncated.
+        self.close()
+        raise IOError("{} is not a sequence file".format(self._file_path))
+
+    def __len__(self):
+        return self._n_runs
+
+    def get_offset(self, run_idx):
+        """
+        Returns the offset of a run in the file, the one of len(self)
+        being the end of the last run.
+
+        Args:
+            run_idx (int): The index of the run.
+
+        Returns:
+            int: The offset of the run.
+        """
+        if self._swap:
+            return struct.unpack_from("<Q", self._offsets, 8 * run_idx)[0]
+        return self._offsets[run_idx]
+
+    def get_run(self, run_idx):
+        """
+        Returns the inputs of a run, without reading the runs before it.
+
+        Args:
+            run_idx (int): The index of the run.
+
+        Returns:
+            tuple(memoryview, memoryview): The shape ids and the left
+              cols of the inputs of the run.
+
+        Raises:
+            IOError: If the offsets of the run are not in the runs of
+              the file.
+        """
+        if not 0 <= run_idx < self._n_runs:
+            raise IndexError("run {} out of range".format(run_idx))
+        start = self.get_offset(run_idx)
+        end = self.get_offset(run_idx + 1)
+        if (not HEADER.size <= start <= end <= self._index_offset
+                or (end - start) % (1 + self.col_size)):
+            raise IOError("{} is not a sequence file - run {} is out of "
+                          "its data".format(self._file_path, run_idx))
+        length = (end - start) // (1 + self.col_size)
+        shape_ids = self._view[start:start + length]
+        cols = self._view[start + length:start + length * (1 + self.col_size)]
+        if self._swap:
+            cols = array(COL_TYPECODES[self.col_size], cols)
+            cols.byteswap()
+            return shape_ids, cols
+        return shape_ids, cols.cast(COL_TYPECODES[self.col_size])
+
+    def iter_runs(self, start=0):
+        """
+        Iterate over the runs.
+
+        Args:
+            start (int): The index of the first run.
+
+        Yields:
+            iterable(tuple(int, int)): The (shape id, col) codes of
+              each run.
+        """
+        for run_idx in range(start, self._n_runs):
+            shape_ids, cols = self.get_run(run_idx)
+            yield zip(shape_ids, cols)
+
+    def close(self):
+        """
+        Close the file.
+        """
+        try:
+            self._offsets.release()
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # Runs handed out are still in use, the file is closed once
+            # they are garbage collected.
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def text_to_binary(text_path, binary_path, col_size=1):
+    """
+    Convert an input file from the text format to the binary format.
+
+    Args:
+        text_path (str): Path to the text input file.
+        binary_path (str): Path to the binary file to write.
+        col_size (int): Bytes per left col.
+    """
+    with open(text_path, "r") as fp:
+        with SequenceWriter(binary_path, col_size) as writer:
+            for codes in iter_codes(fp):
+                writer.write_run(codes)
+
+
+def binary_to_text(binary_path, text_path):
+    """
+    Convert an input file from the binary format to the text format.
+
+    Args:
+        binary_path (str): Path to the binary input file.
+        text_path (str): Path to the text file to write.
+    """
+    shape_types = [shape_class.shape_type for shape_class in SHAPE_CLASSES]
+    with SequenceReader(binary_path) as reader:
+        with open(text_path, "w") as fp:
+            for run in reader.iter_runs():
+                fp.write(",".join(
+                    shape_types[shape_id] + str(col)
+                    for shape_id, col in run) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert input files between text and binary formats.")
+    parser.add_argument("direction", choices=["to-binary", "to-text"])
+    parser.add_argument("input_file", help="Path to input file")
+    parser.add_argument("output_file", help="Path to output file")
+    parser.add_argument("--col-size", type=int, default=1, choices=[1, 2],
+                        help="Bytes per column, 2 for grids wider than 256")
+    args = parser.parse_args()
+    if args.direction == "to-binary":
+        text_to_binary(args.input_file, args.output_file, args.col_size)
+    else:
+        binary_to_text(args.input_file, args.output_file)
+
+
+if __name__ == "__main__":
+    main()
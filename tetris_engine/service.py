@@ -0,0 +1,267 @@
+"""
+A long running engine service, so that small jobs do not pay for
+starting the interpreter.
+
+Clients send runs as lines of the input format, one per line, and get
+back the max height of each run as a line, in order, or a line starting
+with ERROR for an invalid run.
+"""
+import argparse
+import asyncio
+import socket
+import threading
+
+from tetris_engine.engine import GRID_MAX_COLS
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine.log import get_logger
+from tetris_engine.metrics import MetricsExporter
+from tetris_engine.metrics import add_metrics_arguments
+from tetris_engine.metrics import merge_stats
+from tetris_engine.parser import parse_codes
+
+logger = get_logger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7410
+DEFAULT_POOL_SIZE = 8
+# Inputs simulated before letting the other connections run.
+INPUTS_PER_SLICE = 1000
+# Longest line accepted.
+MAX_LINE_SIZE = 16 * 1024 * 1024
+
+
+class EngineService(object):
+    """
+    Serves runs from a pool of warm engines.
+
+    Every connection reads its next line only once the previous result
+    is written out to the client, and a run waits for a free engine, so
+    neither slow clients nor many clients grow the memory of the
+    service.
+    """
+
+    def __init__(self, tot_cols=GRID_MAX_COLS, pool_size=DEFAULT_POOL_SIZE):
+        """
+        Args:
+            tot_cols (int): Tot columns in the Grid.
+            pool_size (int): Number of runs simulated at the same time.
+        """
+        self.tot_cols = tot_cols
+        self.pool_size = pool_size
+        self._engines = None
+        self._all_engines = []
+
+    async def start(self, path=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Start listening.
+
+        Args:
+            path (str): Path of the Unix socket, None to listen on
+              host and port.
+            host (str): The host to listen on.
+            port (int): The TCP port to listen on.
+
+        Returns:
+            asyncio.AbstractServer: The server.
+        """
+        self._engines = asyncio.Queue()
+        for _ in range(self.pool_size):
+            engine = TetrisEngine(tot_rows=None, tot_cols=self.tot_cols)
+            self._all_engines.append(engine)
+            self._engines.put_nowait(engine)
+        if path is not None:
+            server = await asyncio.start_unix_server(
+                self.handle, path, limit=MAX_LINE_SIZE)
+        else:
+            server = await asyncio.start_server(
+                self.handle, host, port, limit=MAX_LINE_SIZE)
+        logger.info("Listening on {}".format(path or "{}:{}".format(
+            host, port)))
+        return server
+
+    def stats(self):
+        """
+        Returns the counters of the engines of the pool, merged.
+        """
+        return merge_stats(engine.stats() for engine in self._all_engines)
+
+    async def handle(self, reader, writer):
+        """
+        Serve the runs of a connection.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                engine = await self._engines.get()
+                try:
+                    response = await self.simulate(engine, line)
+                finally:
+                    self._engines.put_nowait(engine)
+                writer.write(response)
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+            logger.warning("Connection dropped - {}".format(e))
+        finally:
+            writer.close()
+
+    async def simulate(self, engine, line):
+        """
+        Simulate a run.
+
+        Args:
+            engine (TetrisEngine): The engine to simulate on.
+            line (bytes): The run, in the input format.
+
+        Returns:
+            bytes: The line to send back.
+        """
+        try:
+            codes = parse_codes(line.decode())
+            engine.initialize()
+            for start in range(0, len(codes), INPUTS_PER_SLICE):
+                engine.run_sequence(codes[start:start + INPUTS_PER_SLICE])
+                await asyncio.sleep(0)
+        except (IOError, TetrisEngineException, UnicodeDecodeError) as e:
+            return "ERROR {}\n".format(e).encode()
+        return "{}\n".format(engine.height).encode()
+
+
+def serve(path=None, host=DEFAULT_HOST, port=DEFAULT_PORT,
+          tot_cols=GRID_MAX_COLS, pool_size=DEFAULT_POOL_SIZE,
+          metrics_file=None, metrics_port=None):
+    """
+    Run an EngineService until interrupted.
+    """
+    async def run():
+        service = EngineService(tot_cols, pool_size)
+        server = await service.start(path, host, port)
+        exporter = None
+        if metrics_file is not None or metrics_port is not None:
+            exporter = MetricsExporter(service.stats, metrics_file,
+                                       metrics_port).start()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if exporter is not None:
+                exporter.stop()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def connect(path=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Connect to an EngineService.
+
+    Returns:
+        socket.socket: The connected socket.
+    """
+    if path is not None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        return sock
+    return socket.create_connection((host, port))
+
+
+def run_client(input_file, output_file, path=None, host=DEFAULT_HOST,
+               port=DEFAULT_PORT):
+    """
+    Simulate the lines of an input file on an EngineService and write
+    the heights to the output file, like the CLI does.
+
+    Args:
+        input_file (str): Path to the input file.
+        output_file (str): Path to the output file.
+        path (str): Path of the Unix socket, None to connect to host
+          and port.
+        host (str): The host of the service.
+        port (int): The TCP port of the service.
+    """
+    # Opened before connecting and before the output file is truncated,
+    # a missing input file fails here.
+    input_fp = open(input_file, "rb")
+    try:
+        sock = connect(path, host, port)
+    except BaseException:
+        input_fp.close()
+        raise
+    # The exception the sender stopped on, raised again by the caller.
+    sender_errors = []
+
+    def send_lines():
+        # Sent from a thread so results are read while sending.
+        try:
+            with input_fp:
+                for line in input_fp:
+                    if not line.endswith(b"\n"):
+                        line += b"\n"
+                    sock.sendall(line)
+        except BaseException as ex:
+            sender_errors.append(ex)
+        finally:
+            # Without it the service never ends the responses.
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    sender = threading.Thread(target=send_lines)
+    sender.daemon = True
+    sender.start()
+    with sock, sock.makefile("r") as responses, \
+            open(output_file, "w", buffering=1) as fp:
+        for response in responses:
+            if response.startswith("ERROR"):
+                raise IOError(response[len("ERROR "):].strip())
+            fp.write(response)
+    sender.join()
+    if sender_errors:
+        raise sender_errors[0]
+
+
+def add_address_arguments(parser):
+    parser.add_argument("--socket", help="Path of the Unix socket")
+    parser.add_argument("--host", default=DEFAULT_HOST,
+                        help="Host of the service")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help="TCP port of the service")
+
+
+def main_serve(argv):
+    """
+    The `tetris_engine serve` command.
+    """
+    parser = argparse.ArgumentParser(
+        prog="tetris_engine serve",
+        description="Run a Simple Tetris Engine service.")
+    add_address_arguments(parser)
+    parser.add_argument("--cols", type=int, default=GRID_MAX_COLS,
+                        help="Number of columns in the grid")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help="Number of runs simulated at the same time")
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    serve(args.socket, args.host, args.port, args.cols, args.pool_size,
+          args.metrics_file, args.metrics_port)
+
+
+def main_client(argv):
+    """
+    The `tetris_engine client` command.
+    """
+    parser = argparse.ArgumentParser(
+        prog="tetris_engine client",
+        description="Simulate an input file on a Simple Tetris Engine "
+        "service.")
+    parser.add_argument("input_file", help="Path to input file")
+    parser.add_argument("output_file", nargs='?',
+                        help="Path to output file", default="output.txt")
+    add_address_arguments(parser)
+    args = parser.parse_args(argv)
+    run_client(args.input_file, args.output_file, args.socket, args.host,
+               args.port)
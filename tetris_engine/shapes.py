@@ -1,3 +1,6 @@
+from collections import namedtuple
+
+from tetris_engine.exceptions import TetrisEngineException
 
 
 class Coordinate(object):
@@ -21,11 +24,55 @@ class Coordinate(object):
         return self.row == other.row and self.col == other.col
 
 
+class ShapeTable(namedtuple("ShapeTable", [
+        "cells", "width", "height", "bottom", "top", "row_masks"])):
+    """
+    Immutable footprint of a shape, compiled once per shape class.
+
+    Attributes:
+        cells (tuple): (row, col) offsets of the occupied cells, rows
+          counted downwards from the top row of the shape.
+        width (int): Number of columns spanned by the shape.
+        height (int): Number of rows spanned by the shape.
+        bottom (tuple): Row offset of the lowest cell per column.
+        top (tuple): Row offset of the highest cell per column.
+        row_masks (tuple): Bitmask of the occupied columns per row
+          offset.
+    """
+    __slots__ = ()
+
+
+def compile_shape(cells):
+    """
+    Compile the cells of a shape into a ShapeTable.
+
+    Args:
+        cells (tuple): (row, col) offsets of the occupied cells, rows
+          counted downwards from the top row of the shape.
+    Returns:
+        ShapeTable: The compiled footprint of the shape.
+    """
+    width = max(col for _row, col in cells) + 1
+    height = max(row for row, _col in cells) + 1
+    bottom = tuple(max(row for row, col in cells if col == dx)
+                   for dx in range(width))
+    top = tuple(min(row for row, col in cells if col == dx)
+                for dx in range(width))
+    row_masks = tuple(sum(1 << col for row, col in cells if row == dy)
+                      for dy in range(height))
+    return ShapeTable(tuple(cells), width, height, bottom, top, row_masks)
+
+
 class InShape(object):
     """
     Interface for a Shape in Tetris.
     """
     shape_type = ""
+    # (row, col) offsets of the cells occupied by the shape, rows are
+    # counted downwards from its top left coordinate.
+    cells = ()
+    # The ShapeTable compiled from `cells`.
+    table = None
 
     def __init__(self, left_col=0):
         self.left_col = left_col
@@ -43,7 +90,12 @@ class InShape(object):
             list(Coordinate): List of Coordinates occupied by the
               shape.
         """
-        raise NotImplementedError("Please implement!")
+        if not self.cells:
+            raise NotImplementedError("Please implement!")
+        row = pos_cord.row
+        col = pos_cord.col
+        return [Coordinate(row - d_row, col + d_col)
+                for d_row, d_col in self.cells]
 
     def __repr__(self):
         return "InShape-{}{}".format(self.shape_type, self.left_col)
@@ -52,180 +104,275 @@ class InShape(object):
 class QShape(InShape):
 
     shape_type = "Q"
+    cells = ((0, 0), (0, 1), (1, 0), (1, 1))
+    table = compile_shape(cells)
 
     def __init__(self, left_col=0):
         super(QShape, self).__init__(left_col)
 
-    def get_coordinates(self, pos_cord):
-        """
-            Args:
-                pos_cord (Coordinate): Top left coordinate representing
-                the position of the shape.
-            Returns:
-                list(Coordinate): List of Coordinates occupied by the
-                shape.
-            """
-        row = pos_cord.row
-        col = pos_cord.col
-        return [
-            Coordinate(row, col),
-            Coordinate(row, col + 1),
-            Coordinate(row - 1, col),
-            Coordinate(row - 1, col + 1),
-        ]
-
 
 class ZShape(InShape):
 
     shape_type = "Z"
+    cells = ((0, 0), (0, 1), (1, 1), (1, 2))
+    table = compile_shape(cells)
 
     def __init__(self, left_col=0):
         super(ZShape, self).__init__(left_col)
 
-    def get_coordinates(self, pos_cord):
-        """
-            Args:
-                pos_cord (Coordinate): Top left coordinate representing
-                the position of the shape.
-            Returns:
-                list(Coordinate): List of Coordinates occupied by the
-                shape.
-            """
-        row = pos_cord.row
-        col = pos_cord.col
-        return [
-            Coordinate(row, col),
-            Coordinate(row, col + 1),
-            Coordinate(row - 1, col + 1),
-            Coordinate(row - 1, col + 2),
-        ]
-
 
 class SShape(InShape):
 
     shape_type = "S"
+    cells = ((0, 1), (0, 2), (1, 0), (1, 1))
+    table = compile_shape(cells)
 
     def __init__(self, left_col=0):
         super(SShape, self).__init__(left_col)
 
-    def get_coordinates(self, pos_cord):
-        """
-            Args:
-                pos_cord (Coordinate): Top left coordinate representing
-                the position of the shape.
-            Returns:
-                list(Coordinate): List of Coordinates occupied by the
-                shape.
-            """
-        row = pos_cord.row
-        col = pos_cord.col
-        return [
-            Coordinate(row, col + 1),
-            Coordinate(row, col + 2),
-            Coordinate(row - 1, col),
-            Coordinate(row - 1, col + 1),
-        ]
-
 
 class TShape(InShape):
 
     shape_type = "T"
+    cells = ((0, 0), (0, 1), (0, 2), (1, 1))
+    table = compile_shape(cells)
 
     def __init__(self, left_col=0):
         super(TShape, self).__init__(left_col)
 
-    def get_coordinates(self, pos_cord):
-        """
-            Args:
-                pos_cord (Coordinate): Top left coordinate representing
-                the position of the shape.
-            Returns:
-                list(Coordinate): List of Coordinates occupied by the
-                shape.
-            """
-        row = pos_cord.row
-        col = pos_cord.col
-        return [
-            Coordinate(row, col),
-            Coordinate(row, col + 1),
-            Coordinate(row, col + 2),
-            Coordinate(row - 1, col + 1),
-        ]
-
 
 class IShape(InShape):
 
     shape_type = "I"
+    cells = ((0, 0), (0, 1), (0, 2), (0, 3))
+    table = compile_shape(cells)
 
     def __init__(self, left_col=0):
         super(IShape, self).__init__(left_col)
 
-    def get_coordinates(self, pos_cord):
-        """
-            Args:
-                pos_cord (Coordinate): Top left coordinate representing
-                the position of the shape.
-            Returns:
-                list(Coordinate): List of Coordinates occupied by the
-                shape.
-            """
-        row = pos_cord.row
-        col = pos_cord.col
-        return [
-            Coordinate(row, col),
-            Coordinate(row, col + 1),
-            Coordinate(row, col + 2),
-            Coordinate(row, col + 3),
-        ]
-
 
 class LShape(InShape):
 
     shape_type = "L"
+    cells = ((0, 0), (1, 0), (2, 0), (2, 1))
+    table = compile_shape(cells)
 
     def __init__(self, left_col=0):
         super(LShape, self).__init__(left_col)
 
-    def get_coordinates(self, pos_cord):
-        """
-            Args:
-                pos_cord (Coordinate): Top left coordinate representing
-                the position of the shape.
-            Returns:
-                list(Coordinate): List of Coordinates occupied by the
-                shape.
-            """
-        row = pos_cord.row
-        col = pos_cord.col
-        return [
-            Coordinate(row, col),
-            Coordinate(row - 1, col),
-            Coordinate(row - 2, col),
-            Coordinate(row - 2, col + 1),
-        ]
-
 
 class JShape(InShape):
 
     shape_type = "J"
+    cells = ((0, 1), (1, 1), (2, 0), (2, 1))
+    table = compile_shape(cells)
 
     def __init__(self, left_col=0):
         super(JShape, self).__init__(left_col)
 
-    def get_coordinates(self, pos_cord):
-        """
-            Args:
-                pos_cord (Coordinate): Top left coordinate representing
-                the position of the shape.
-            Returns:
-                list(Coordinate): List of Coordinates occupied by the
-                shape.
-            """
-        row = pos_cord.row
-        col = pos_cord.col
-        return [
-            Coordinate(row, col + 1),
-            Coordinate(row - 1, col + 1),
-            Coordinate(row - 2, col),
-            Coordinate(row - 2, col + 1),
-        ]
+
+# Shape ids are stored in a byte by the binary sequence files.
+MAX_SHAPES = 256
+# Appended to the shape type once per quarter turn, e.g "Tr" is T turned
+# clockwise and "Trr" is T upside down.
+ROTATION_SUFFIX = "r"
+# The characters of a cell mask, see parse_mask.
+MASK_CELL = "#"
+MASK_EMPTY = "."
+
+# The registered shapes, the position of a shape is its shape id. The
+# engine looks the tables up by shape id, so these are only ever
+# appended to.
+SHAPE_CLASSES = []
+SHAPE_TABLES = []
+SHAPE_IDS = {}
+
+
+def parse_mask(mask):
+    """
+    Parse a declarative cell mask into the cells of a shape.
+
+    Args:
+        mask (str): The rows of the shape from the top one, separated by
+          white space, '#' for a cell of the shape and '.' for an empty
+          one (e.g '###  .#.' for T).
+
+    Returns:
+        tuple: (row, col) offsets of the cells, rows counted downwards
+          from the top row of the shape.
+
+    Raises:
+        TetrisEngineException: For an invalid or empty mask, or one
+          whose cells are not connected (e.g with an empty column
+          between two cells).
+    """
+    cells = []
+    for row, line in enumerate(mask.split()):
+        for col, char in enumerate(line):
+            if char == MASK_CELL:
+                cells.append((row, col))
+            elif char != MASK_EMPTY:
+                raise TetrisEngineException(
+                    "Invalid shape mask - {!r}".format(mask))
+    if not cells:
+        raise TetrisEngineException("Empty shape mask - {!r}".format(mask))
+    if not is_connected(cells):
+        raise TetrisEngineException(
+            "Disconnected shape mask - {!r}".format(mask))
+    return normalize_cells(cells)
+
+
+def is_connected(cells):
+    """
+    Check if every cell of a shape can be reached from any other one
+    through cells sharing a side. A connected shape has no empty row or
+    column between its cells, which compile_shape relies on.
+
+    Args:
+        cells (iterable(tuple(int, int))): (row, col) offsets of the
+          cells.
+
+    Returns:
+        bool: True if the cells are connected.
+    """
+    remaining = set(cells)
+    stack = [remaining.pop()]
+    while stack:
+        row, col = stack.pop()
+        for neighbour in ((row - 1, col), (row + 1, col), (row, col - 1),
+                          (row, col + 1)):
+            if neighbour in remaining:
+                remaining.remove(neighbour)
+                stack.append(neighbour)
+    return not remaining
+
+
+def normalize_cells(cells):
+    """
+    Returns the cells moved to the top left corner, in order.
+    """
+    min_row = min(row for row, _col in cells)
+    min_col = min(col for _row, col in cells)
+    return tuple(sorted((row - min_row, col - min_col)
+                        for row, col in cells))
+
+
+def rotate_cells(cells):
+    """
+    Returns the cells of a shape turned a quarter clockwise.
+    """
+    height = max(row for row, _col in cells) + 1
+    return normalize_cells([(col, height - 1 - row) for row, col in cells])
+
+
+def register_shape_class(shape_class):
+    """
+    Register a shape class, its shape type becomes a valid input.
+
+    Args:
+        shape_class (type): A subclass of InShape with its shape_type,
+          cells and table set.
+
+    Returns:
+        int: The shape id of the shape.
+    """
+    shape_type = shape_class.shape_type
+    if not shape_type or any(char.isdigit() or char in "-,"
+                             or char.isspace() for char in shape_type):
+        raise TetrisEngineException(
+            "Invalid shape type - {!r}".format(shape_type))
+    if shape_type in SHAPE_IDS:
+        raise TetrisEngineException(
+            "Shape {} is already registered".format(shape_type))
+    if len(SHAPE_CLASSES) >= MAX_SHAPES:
+        raise TetrisEngineException(
+            "Cannot register more than {} shapes".format(MAX_SHAPES))
+    shape_id = len(SHAPE_CLASSES)
+    SHAPE_CLASSES.append(shape_class)
+    SHAPE_TABLES.append(shape_class.table)
+    SHAPE_IDS[shape_type] = shape_id
+    return shape_id
+
+
+def register_shape(shape_type, mask, rotations=False):
+    """
+    Register a shape given by its cell mask, compiled once here so that
+    it is placed as fast as the built in shapes.
+
+    Args:
+        shape_type (str): The name of the shape in the input, without
+          digits (e.g 'X' for the inputs 'X0', 'X4').
+        mask (str): The cells of the shape, see parse_mask.
+        rotations (bool): Also register its other distinct rotations,
+          see ROTATION_SUFFIX.
+
+    Returns:
+        list(int): The shape ids of the shape and of its rotations.
+    """
+    cells = parse_mask(mask)
+    shape_class = type("{}Shape".format(shape_type), (InShape,), {
+        "shape_type": shape_type,
+        "cells": cells,
+        "table": compile_shape(cells),
+    })
+    shape_ids = [register_shape_class(shape_class)]
+    if rotations:
+        shape_ids.extend(register_rotations(shape_type))
+    return shape_ids
+
+
+def register_rotations(shape_type):
+    """
+    Register the rotations of a registered shape that differ from it.
+
+    Args:
+        shape_type (str): The name of the shape.
+
+    Returns:
+        list(int): The shape ids of the rotations, in clockwise order.
+
+    Raises:
+        TetrisEngineException: If the name of a rotation is registered
+          for other cells.
+    """
+    cells = normalize_cells(SHAPE_CLASSES[SHAPE_IDS[shape_type]].cells)
+    rotations = []
+    rotated = rotate_cells(cells)
+    while rotated != cells:
+        rotated_type = shape_type + ROTATION_SUFFIX * (len(rotations) + 1)
+        rotated_id = SHAPE_IDS.get(rotated_type)
+        # Checked before any rotation is registered.
+        if rotated_id is not None and normalize_cells(
+                SHAPE_CLASSES[rotated_id].cells) != rotated:
+            raise TetrisEngineException(
+                "Shape {} is registered and is not a rotation of {}".format(
+                    rotated_type, shape_type))
+        rotations.append((rotated_type, rotated_id, rotated))
+        rotated = rotate_cells(rotated)
+    shape_ids = []
+    for rotated_type, rotated_id, rotated in rotations:
+        if rotated_id is not None:
+            shape_ids.append(rotated_id)
+        else:
+            shape_ids.extend(register_shape(
+                rotated_type, cells_to_mask(rotated)))
+    return shape_ids
+
+
+def cells_to_mask(cells):
+    """
+    Returns the cell mask of the cells of a shape, see parse_mask.
+    """
+    width = max(col for _row, col in cells) + 1
+    height = max(row for row, _col in cells) + 1
+    return " ".join(
+        "".join(MASK_CELL if (row, col) in cells else MASK_EMPTY
+                for col in range(width))
+        for row in range(height))
+
+
+# The built in shapes keep the shape ids 0 to 6.
+for _shape_class in (QShape, ZShape, SShape, TShape, IShape, LShape,
+                     JShape):
+    register_shape_class(_shape_class)
+del _shape_class
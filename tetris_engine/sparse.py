@@ -0,0 +1,316 @@
+"""
+A TetrisEngine for very wide boards with few occupied cells.
+
+The dense engine keeps a bitmask of every column per row and the
+skyline of every column, so its memory and the cost of a placement grow
+with the width of the board. The sparse engine keeps the occupied rows
+of the columns that have any, their skyline, and a count of occupied
+cells per row, so both grow with the occupied cells instead. Results
+and snapshots are the same as the dense engine's.
+"""
+import sys
+from array import array
+from bisect import bisect_left
+
+from tetris_engine.engine import GRID_MAX_COLS
+from tetris_engine.engine import GRID_MAX_ROWS
+from tetris_engine.engine import HEIGHT_INIT
+from tetris_engine.engine import SNAPSHOT_HEADER
+from tetris_engine.engine import SNAPSHOT_MAGIC
+from tetris_engine.engine import SNAPSHOT_VERSION
+from tetris_engine.engine import State
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.engine import unpack_snapshot
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine.log import get_logger
+from tetris_engine.shapes import SHAPE_CLASSES
+from tetris_engine.shapes import SHAPE_TABLES
+
+
+logger = get_logger(__name__)
+
+
+class SparseTetrisEngine(TetrisEngine):
+    """
+    A TetrisEngine storing only the occupied cells, per column.
+    """
+
+    def __init__(self, tot_rows=GRID_MAX_ROWS, tot_cols=GRID_MAX_COLS):
+        """
+        Args:
+            tot_rows (int): Tot rows in the Grid, None for a grid
+              without a height limit.
+            tot_cols (int): Tot columns in the Grid.
+        """
+        super(SparseTetrisEngine, self).__init__(tot_rows, tot_cols)
+        # The occupied rows of each column that has any.
+        self._cells = {}
+        # The top most non free row of each column that has any, the
+        # other columns are at HEIGHT_INIT.
+        self._tops = {}
+        # The number of occupied cells of each row, up to the height.
+        self._row_counts = []
+
+    def initialize(self):
+        """
+        Reset/Initialize the Engine.
+        """
+        logger.debug("Initializing Engine...")
+        if self.trace is not None:
+            self.trace.add_reset()
+        self._height = HEIGHT_INIT
+        self._cells = {}
+        self._tops = {}
+        self._row_counts = []
+
+    def get_state(self, coord):
+        """
+        Returns the State of a cell in the grid, see TetrisEngine.
+        """
+        if coord.row in self._cells.get(coord.col, ()):
+            return State.OCCUPIED
+        if coord.row <= self._tops.get(coord.col, HEIGHT_INIT):
+            return State.BLOCKED
+        return State.UNOCCUPIED
+
+    def clone(self):
+        """
+        Returns a copy of the Engine that can be played independently,
+        see TetrisEngine.
+        """
+        engine = super(SparseTetrisEngine, self).clone()
+        engine._cells = dict(
+            (col, set(rows)) for col, rows in self._cells.items())
+        engine._tops = dict(self._tops)
+        engine._row_counts = list(self._row_counts)
+        return engine
+
+    def board_key(self):
+        """
+        Returns a hashable key of the board, see TetrisEngine.
+        """
+        return (tuple(sorted((col, tuple(sorted(rows)))
+                             for col, rows in self._cells.items())),
+                tuple(sorted(self._tops.items())))
+
+    def count_cells(self):
+        """
+        Returns the number of occupied cells in the grid.
+        """
+        return sum(self._row_counts)
+
+    def column_heights(self):
+        """
+        Returns the height of every column, see TetrisEngine.
+        """
+        heights = [HEIGHT_INIT + 1] * self.cols
+        for col, top in self._tops.items():
+            heights[col] = top + 1
+        return heights
+
+    def snapshot(self):
+        """
+        Returns the state of the Engine in the binary form of
+        TetrisEngine.snapshot, the two can restore each other's.
+
+        Returns:
+            bytes: The snapshot.
+        """
+        masks = [0] * len(self._row_counts)
+        for col, rows in self._cells.items():
+            for row in rows:
+                masks[row] |= 1 << col
+        row_bytes = (self.cols + 7) // 8
+        rows = HEIGHT_INIT if self.rows is None else self.rows
+        skyline = array("q", [HEIGHT_INIT]) * self.cols
+        for col, top in self._tops.items():
+            skyline[col] = top
+        if sys.byteorder != "little":
+            skyline.byteswap()
+        return b"".join([
+            SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, rows,
+                                 self.cols, self._height, len(masks)),
+            skyline.tobytes(),
+        ] + [mask.to_bytes(row_bytes, "little") for mask in masks])
+
+    def restore(self, snapshot):
+        """
+        Restore the state of the Engine from a snapshot of either engine.
+
+        Args:
+            snapshot (bytes): A snapshot returned by snapshot.
+        """
+        rows, cols, height, n_rows, skyline = unpack_snapshot(snapshot)
+        self.rows = rows
+        self.cols = cols
+        self._height = height
+        self._tops = dict((col, top) for col, top in enumerate(skyline)
+                          if top != HEIGHT_INIT)
+        offset = SNAPSHOT_HEADER.size + 8 * cols
+        row_bytes = (cols + 7) // 8
+        self._cells = {}
+        self._row_counts = []
+        for row in range(n_rows):
+            start = offset + row * row_bytes
+            mask = int.from_bytes(snapshot[start:start + row_bytes],
+                                  "little")
+            self._row_counts.append(bin(mask).count("1"))
+            while mask:
+                low_bit = mask & -mask
+                self._cells.setdefault(low_bit.bit_length() - 1,
+                                       set()).add(row)
+                mask ^= low_bit
+
+    def get_highest_unoccupied_row(self, col):
+        """
+        Returns the highest unoccupied row for the given column, see
+        TetrisEngine.
+        """
+        if 0 <= col < self.cols:
+            row = self._tops.get(col, HEIGHT_INIT) + 1
+            if self.rows is None or row < self.rows:
+                return row
+        raise TetrisEngineException(
+            "Cannot find highest onoccupied row for col {}".format(col))
+
+    def run_sequence(self, codes, landing_rows=None, heights=None):
+        """
+        Place a sequence of shapes given by their codes, see
+        TetrisEngine.run_sequence.
+        """
+        tables = SHAPE_TABLES
+        for shape_id, col in codes:
+            row = self._place(tables[shape_id], col)
+            if row is None:
+                raise TetrisEngineException(
+                    "{}{} - Input cannot be placed".format(
+                        SHAPE_CLASSES[shape_id].shape_type, col))
+            if landing_rows is not None:
+                landing_rows.append(row)
+            if heights is not None:
+                heights.append(self._height + 1)
+        return self._height + 1
+
+    def replay_sequence(self, steps):
+        """
+        Place shapes at known rows and remove the rows they filled, see
+        TetrisEngine.replay_sequence.
+        """
+        tables = SHAPE_TABLES
+        for shape_id, col, row, filled in steps:
+            self._mark_shape_occupied(tables[shape_id], row, col)
+            self.n_pieces += 1
+            if self._height < row:
+                self._height = row
+                if self._peak_height < row:
+                    self._peak_height = row
+            if filled:
+                self._remove_rows(sorted(
+                    row - bit for bit in range(filled.bit_length())
+                    if filled >> bit & 1))
+        return self._height + 1
+
+    def _get_landing_row(self, table, col):
+        """
+        Returns the row at which a shape comes to rest, None if it does
+        not fit in the columns of the grid.
+        """
+        if col < 0 or col + table.width > self.cols:
+            return None
+        tops = self._tops
+        row = HEIGHT_INIT
+        for d_col, d_row in enumerate(table.bottom):
+            landing = tops.get(col + d_col, HEIGHT_INIT) + 1 + d_row
+            if landing > row:
+                row = landing
+        return row
+
+    def _mark_shape_occupied(self, table, row, col):
+        """
+        Mark the cells of a shape occupied in the grid.
+        """
+        row_counts = self._row_counts
+        if len(row_counts) <= row:
+            row_counts.extend([0] * (row + 1 - len(row_counts)))
+        cells = self._cells
+        for d_row, d_col in table.cells:
+            rows = cells.get(col + d_col)
+            if rows is None:
+                rows = cells[col + d_col] = set()
+            rows.add(row - d_row)
+            row_counts[row - d_row] += 1
+        tops = self._tops
+        for d_col, d_row in enumerate(table.top):
+            tops[col + d_col] = row - d_row
+
+    def mark_coords_occupied_by_shape(self, coords):
+        """
+        Mark the given coordinates occupied by an input in the grid.
+        """
+        row_counts = self._row_counts
+        for coord in coords:
+            if len(row_counts) <= coord.row:
+                row_counts.extend([0] * (coord.row + 1 - len(row_counts)))
+            rows = self._cells.setdefault(coord.col, set())
+            if coord.row not in rows:
+                rows.add(coord.row)
+                row_counts[coord.row] += 1
+            if self._tops.get(coord.col, HEIGHT_INIT) < coord.row:
+                self._tops[coord.col] = coord.row
+
+    def is_unoccupied(self, coords):
+        """
+        Returns True if the coordinates can be occupied in the grid.
+        """
+        for coord in coords:
+            if self.is_coord_out_of_bounds(coord):
+                return False
+            if coord.row <= self._tops.get(coord.col, HEIGHT_INIT):
+                return False
+        return True
+
+    def check_and_remove_filled_rows(self, low_row=0, high_row=None):
+        """
+        Remove the rows between low_row and high_row (the max height by
+        default) which have all cells occupied.
+        """
+        row_counts = self._row_counts
+        if high_row is None or high_row >= len(row_counts):
+            high_row = min(self.height, len(row_counts)) - 1
+        filled_rows = [row for row in range(low_row, high_row + 1)
+                       if row_counts[row] == self.cols]
+        if filled_rows:
+            self._remove_rows(filled_rows)
+        return filled_rows
+
+    def remove_row(self, row):
+        """
+        Remove a given row from the grid.
+        """
+        self._remove_rows([row])
+
+    def _remove_rows(self, removed_rows):
+        """
+        Remove rows from the grid, the higher rows move down.
+
+        Args:
+            removed_rows (list(int)): The rows, in increasing order.
+        """
+        for row in reversed(removed_rows):
+            del self._row_counts[row]
+        removed = set(removed_rows)
+        for col, rows in self._cells.items():
+            self._cells[col] = set(
+                row - bisect_left(removed_rows, row)
+                for row in rows if row not in removed)
+        # Every column reaching a removed row drops once per removed row
+        # below its top.
+        tops = self._tops
+        for col, top in list(tops.items()):
+            top -= bisect_left(removed_rows, top + 1)
+            if top == HEIGHT_INIT:
+                del tops[col]
+            else:
+                tops[col] = top
+        self._height -= len(removed_rows)
+        self.n_rows_cleared += len(removed_rows)
@@ -0,0 +1,432 @@
+"""
+Compact binary traces of the placements of an engine.
+
+    header  MAGIC, version, tot rows (HEIGHT_INIT for no limit), tot cols
+    steps   per placement, the shape id, the left col, the landing row
+            and the mask of the rows it filled (4 bytes each)
+
+A step with the shape id RESET starts a new run, it is recorded when
+the engine is initialized. Bit i of the mask is set when the row i rows
+below the top of the shape was filled and removed, so shapes taller
+than MAX_SHAPE_HEIGHT rows cannot be traced. All integers are little
+endian.
+
+The engine appends the steps to an array of the writer, which writes
+them out in large blocks.
+
+Two traces are compared step by step to find where two runs of the
+same input diverge, and a trace rebuilds the boards it recorded without
+looking for the landing rows again.
+"""
+import argparse
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import islice
+
+from tetris_engine.engine import HEIGHT_INIT
+from tetris_engine.engine import TetrisEngine
+from tetris_engine.exceptions import TetrisEngineException
+from tetris_engine.shapes import SHAPE_CLASSES
+from tetris_engine.shapes import SHAPE_TABLES
+
+MAGIC = b"TETR"
+VERSION = 1
+HEADER = struct.Struct("<4sBxxxqQ")
+# shape id, left col, landing row, mask of the filled rows.
+STEP = struct.Struct("<IIII")
+# The shape id of the steps starting a new run.
+RESET = 0xFFFFFFFF
+# Steps buffered before a write to the trace file.
+BUFFER_STEPS = 1 << 16
+# Steps read from the trace file at a time.
+READ_STEPS = 4096
+# Rows of the tallest shape the mask of the filled rows can hold.
+MAX_SHAPE_HEIGHT = 32
+
+
+class Divergence(namedtuple("Divergence", [
+        "step", "run", "piece", "expected", "actual"])):
+    """
+    The first step at which two traces differ.
+
+    Attributes:
+        step (int): The index of the step in the traces.
+        run (int): The index of the run of the step.
+        piece (int): The index of the placement in the run, None for
+          the step starting the run.
+        expected (tuple): The step of the first trace, None when it
+          ended before.
+        actual (tuple): The step of the second trace, None when it
+          ended before.
+    """
+    __slots__ = ()
+
+
+class TraceWriter(object):
+    """
+    Writes the runs and placements of an engine to a trace file.
+    """
+
+    def __init__(self, file_path, tot_rows, tot_cols):
+        """
+        Args:
+            file_path (str): Path to the file to write.
+            tot_rows (int): Tot rows in the Grid, None for a grid
+              without a height limit.
+            tot_cols (int): Tot columns in the Grid.
+
+        Raises:
+            TetrisEngineException: If a registered shape is too tall to
+              be traced.
+        """
+        # The number of registered shapes checked by check_shapes.
+        self._n_checked = 0
+        self.check_shapes()
+        self._fp = open(file_path, "wb")
+        self._fp.write(HEADER.pack(
+            MAGIC, VERSION, HEIGHT_INIT if tot_rows is None else tot_rows,
+            tot_cols))
+        # The fields of the steps not written yet, the engine appends
+        # to it directly and flushes it once it holds flush_size fields.
+        self.steps = array("I")
+        self.flush_size = 4 * BUFFER_STEPS
+        # Shape ids by the id of their table, the engine only has the
+        # table at hand.
+        self._shape_ids = {}
+
+    def check_shapes(self):
+        """
+        Check the shapes registered since the last check can be traced,
+        the engine calls it before it places any shape.
+
+        Raises:
+            TetrisEngineException: If a shape is too tall to be traced.
+        """
+        for shape_id in range(self._n_checked, len(SHAPE_TABLES)):
+            if SHAPE_TABLES[shape_id].height > MAX_SHAPE_HEIGHT:
+                raise TetrisEngineException(
+                    "Shapes taller than {} rows cannot be traced - {}".format(
+                        MAX_SHAPE_HEIGHT, SHAPE_CLASSES[shape_id].shape_type))
+            self._n_checked = shape_id + 1
+
+    def check_table(self, table):
+        """
+        Check a shape can be traced, before it is placed.
+
+        Args:
+            table (ShapeTable): The compiled footprint of the shape.
+
+        Raises:
+            TetrisEngineException: If the shape is not registered or is
+              too tall to be traced.
+        """
+        if id(table) not in self._shape_ids:
+            self._get_shape_id(table)
+
+    def add_reset(self):
+        """
+        Record the start of a new run.
+        """
+        self.check_shapes()
+        if len(self.steps) >= self.flush_size:
+            self.flush()
+        self.steps.extend((RESET, 0, 0, 0))
+
+    def add_step(self, table, col, row, filled_rows):
+        """
+        Record a placement.
+
+        Args:
+            table (ShapeTable): The compiled footprint of the shape.
+            col (int): The left most column of the shape.
+            row (int): The row at which the top of the shape is placed.
+            filled_rows (list(int)): The rows it filled and removed.
+        """
+        shape_id = self._shape_ids.get(id(table))
+        if shape_id is None:
+            shape_id = self._get_shape_id(table)
+        filled = 0
+        for filled_row in filled_rows:
+            filled |= 1 << (row - filled_row)
+        if len(self.steps) >= self.flush_size:
+            self.flush()
+        self.steps.extend((shape_id, col, row, filled))
+
+    def _get_shape_id(self, table):
+        # Shapes registered since the last lookup are added on demand.
+        self.check_shapes()
+        for shape_id, shape_table in enumerate(SHAPE_TABLES):
+            self._shape_ids.setdefault(id(shape_table), shape_id)
+        try:
+            return self._shape_ids[id(table)]
+        except KeyError:
+            raise TetrisEngineException(
+                "Only registered shapes can be traced")
+
+    def flush(self):
+        """
+        Write the buffered steps to the file.
+        """
+        steps = self.steps
+        if sys.byteorder != "little":
+            steps = array("I", steps)
+            steps.byteswap()
+        self._fp.write(steps.tobytes())
+        # The engine may hold the array, it is emptied in place.
+        del self.steps[:]
+
+    def close(self):
+        """
+        Flush the buffered steps and close the file.
+        """
+        self.flush()
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TraceReader(object):
+    """
+    Streams the steps of a trace file.
+    """
+
+    def __init__(self, file_path):
+        """
+        Args:
+            file_path (str): Path to the file to read.
+        """
+        self._fp = open(file_path, "rb")
+        header = self._fp.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise IOError("{} is not a trace file".format(file_path))
+        magic, version, rows, cols = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise IOError("{} is not a trace file".format(file_path))
+        self.rows = None if rows == HEIGHT_INIT else rows
+        self.cols = cols
+
+    def iter_steps(self):
+        """
+        Iterate over the steps, from the current one.
+
+        Yields:
+            tuple(int, int, int, int): The shape id (RESET for the start
+              of a run), left col, landing row and mask of the filled
+              rows of each step.
+        """
+        read = self._fp.read
+        while True:
+            data = read(STEP.size * READ_STEPS)
+            if len(data) % STEP.size:
+                raise IOError("Truncated trace file")
+            if not data:
+                return
+            for step in STEP.iter_unpack(data):
+                yield step
+
+    def close(self):
+        """
+        Close the file.
+        """
+        self._fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+@contextmanager
+def record_trace(engine, file_path):
+    """
+    Record the runs and placements of an engine to a trace file for the
+    duration of a with block.
+
+    Args:
+        engine (TetrisEngine): The engine to trace.
+        file_path (str): Path to the trace file to write.
+
+    Yields:
+        TraceWriter: The writer of the trace.
+    """
+    with TraceWriter(file_path, engine.rows, engine.cols) as writer:
+        engine.trace = writer
+        try:
+            yield writer
+        finally:
+            engine.trace = None
+
+
+def filled_rows_of(row, filled):
+    """
+    Returns the rows of a mask of filled rows.
+
+    Args:
+        row (int): The landing row of the step.
+        filled (int): The mask of the filled rows of the step.
+
+    Returns:
+        list(int): The filled rows, in increasing order.
+    """
+    rows = []
+    while filled:
+        bit = filled.bit_length() - 1
+        rows.append(row - bit)
+        filled ^= 1 << bit
+    return rows
+
+
+def format_step(step):
+    """
+    Returns a step in the input format, with its landing row and filled
+    rows.
+    """
+    if step is None:
+        return "end of trace"
+    shape_id, col, row, filled = step
+    if shape_id == RESET:
+        return "start of run"
+    text = "{}{} at row {}".format(SHAPE_CLASSES[shape_id].shape_type, col,
+                                   row)
+    if filled:
+        text += ", removed rows {}".format(
+            " ".join(str(filled_row)
+                     for filled_row in filled_rows_of(row, filled)))
+    return text
+
+
+def first_divergence(expected_path, actual_path):
+    """
+    Stream two traces and find the first step at which they differ.
+
+    Args:
+        expected_path (str): Path to the reference trace.
+        actual_path (str): Path to the trace to check.
+
+    Returns:
+        Divergence: The first differing step, None if the traces are
+          the same.
+    """
+    with TraceReader(expected_path) as expected, \
+            TraceReader(actual_path) as actual:
+        if (expected.rows, expected.cols) != (actual.rows, actual.cols):
+            raise TetrisEngineException(
+                "The traces are of different grids - {}x{} and {}x{}".format(
+                    expected.rows, expected.cols, actual.rows, actual.cols))
+        expected_steps = expected.iter_steps()
+        actual_steps = actual.iter_steps()
+        n_steps = 0
+        run = -1
+        piece = None
+        for expected_step in expected_steps:
+            actual_step = next(actual_steps, None)
+            run, piece = _next_position(expected_step, run, piece)
+            if expected_step != actual_step:
+                return Divergence(n_steps, run, piece, expected_step,
+                                  actual_step)
+            n_steps += 1
+        actual_step = next(actual_steps, None)
+        if actual_step is not None:
+            run, piece = _next_position(actual_step, run, piece)
+            return Divergence(n_steps, run, piece, None, actual_step)
+    return None
+
+
+def _next_position(step, run, piece):
+    # The run and the index in it of the step after (run, piece).
+    if step[0] == RESET:
+        return run + 1, None
+    return run, 0 if piece is None else piece + 1
+
+
+def replay(file_path, engine=None, stop=None):
+    """
+    Rebuild the boards of a trace, placing every shape at its recorded
+    row and removing its recorded rows.
+
+    Args:
+        file_path (str): Path to the trace file.
+        engine (TetrisEngine): The engine to rebuild the boards on, a
+          new one by default.
+        stop (int): The number of steps to replay, all by default.
+
+    Yields:
+        TetrisEngine: The engine at the end of each run, the last one
+          stopping after the last step replayed.
+    """
+    with TraceReader(file_path) as reader:
+        if engine is None:
+            engine = TetrisEngine(reader.rows, reader.cols)
+        engine.rows = reader.rows
+        engine.cols = reader.cols
+        engine.initialize()
+        steps = reader.iter_steps()
+        if stop is not None:
+            steps = islice(steps, stop)
+        started = False
+        run = []
+        for step in steps:
+            if step[0] != RESET:
+                run.append(step)
+                continue
+            if started:
+                engine.replay_sequence(run)
+                yield engine
+                engine.initialize()
+                run = []
+            started = True
+        if started:
+            engine.replay_sequence(run)
+            yield engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="tetris_engine trace",
+        description="Compare or replay placement traces.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+    verify_parser = subparsers.add_parser(
+        "verify", help="Report the first step at which two traces differ")
+    verify_parser.add_argument("expected_file",
+                               help="Path to the reference trace")
+    verify_parser.add_argument("actual_file",
+                               help="Path to the trace to check")
+    replay_parser = subparsers.add_parser(
+        "replay", help="Rebuild the boards of a trace and write the max "
+        "height of every run")
+    replay_parser.add_argument("trace_file", help="Path to the trace")
+    replay_parser.add_argument("output_file", help="Path to output file")
+    args = parser.parse_args(argv)
+    if args.command == "replay":
+        with open(args.output_file, "w") as fp:
+            for engine in replay(args.trace_file):
+                fp.write(str(engine.height) + "\n")
+        return 0
+    try:
+        divergence = first_divergence(args.expected_file, args.actual_file)
+    except (IOError, TetrisEngineException) as e:
+        sys.stderr.write("Cannot compare the traces - {}\n".format(e))
+        return 2
+    if divergence is None:
+        print("The traces match")
+        return 0
+    print("The traces differ at step {}, line {}{}:".format(
+        divergence.step, divergence.run + 1,
+        "" if divergence.piece is None else
+        ", input {}".format(divergence.piece + 1)))
+    print("  expected: {}".format(format_step(divergence.expected)))
+    print("  actual: {}".format(format_step(divergence.actual)))
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
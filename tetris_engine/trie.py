@@ -0,0 +1,102 @@
+class TrieNode(object):
+    """
+    A node of a SequenceTrie, reached by the inputs on its path from
+    the root.
+    """
+    __slots__ = ("children", "run_ids")
+
+    def __init__(self):
+        # The next (shape id, col) code to its TrieNode.
+        self.children = {}
+        # The runs ending at this node.
+        self.run_ids = []
+
+
+class SequenceTrie(object):
+    """
+    A trie of runs of (shape id, col) codes, so that the inputs shared
+    by the start of several runs are only simulated once.
+    """
+
+    def __init__(self):
+        self.root = TrieNode()
+        # Number of runs and of inputs added.
+        self.n_runs = 0
+        self.n_inputs = 0
+        # Number of nodes below the root, i.e the inputs to simulate.
+        self.n_nodes = 0
+
+    def add(self, codes):
+        """
+        Add a run.
+
+        Args:
+            codes (iterable(tuple(int, int))): The (shape id, col) codes
+              of the inputs of the run.
+
+        Returns:
+            int: The index of the run.
+        """
+        node = self.root
+        for code in codes:
+            self.n_inputs += 1
+            child = node.children.get(code)
+            if child is None:
+                child = node.children[code] = TrieNode()
+                self.n_nodes += 1
+            node = child
+        run_id = self.n_runs
+        node.run_ids.append(run_id)
+        self.n_runs += 1
+        return run_id
+
+    def evaluate(self, engine):
+        """
+        Simulate every run, walking the trie depth first and forking the
+        engine where runs part.
+
+        Only the state of the nodes on the current path where runs part
+        is kept, the engine of a run that parts from it is copied when
+        the walk reaches it.
+
+        Args:
+            engine (TetrisEngine): The engine to simulate on, it is
+              reset first.
+
+        Returns:
+            list(int): The max height of each run, in the order they
+              were added.
+        """
+        heights = [None] * self.n_runs
+        engine.initialize()
+        root_engine = engine
+        # Per node on the path where runs part, a copy of the engine at
+        # that node, its children left to visit and their number.
+        stack = []
+        node = self.root
+        while True:
+            for run_id in node.run_ids:
+                heights[run_id] = engine.height
+            children = node.children
+            if children:
+                items = iter(children.items())
+                code, node = next(items)
+                if len(children) > 1:
+                    stack.append([engine.clone(), items, len(children) - 1])
+                engine.place(*code)
+                continue
+            if engine is not root_engine:
+                root_engine.add_counters(engine)
+            if not stack:
+                return heights
+            # Continue with the next run parting from the deepest node,
+            # the last one takes the copy of the node.
+            frame = stack[-1]
+            frame[2] -= 1
+            if frame[2]:
+                engine = frame[0].clone()
+            else:
+                stack.pop()
+                engine = frame[0]
+            code, node = next(frame[1])
+            engine.place(*code)